@@ -0,0 +1,254 @@
+"""Benchmarks the public functions of recursive_backtracker on seeded
+perfect and braided mazes from 2x2 up to 2000x2000, timing each function
+over several runs and measuring its peak memory in one more run traced
+with tracemalloc, and reports the results as JSON.
+
+    python benchmarks/benchmark.py --sizes 2,10,50 --repeat 5 -o run.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+from math import ceil
+from statistics import median
+from time import perf_counter, strftime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'src'))
+from recursive_backtracker import (  # noqa: E402
+    bounded_shortest_paths, braid_maze, count_shortest_paths,
+    generate_maze, generate_maze_rows, is_valid_maze, load_maze, numpy,
+    parse_visual_maze, save_maze, solve_maze, visualise_maze)
+
+# Side lengths of the square mazes benchmarked by default.
+SIZES = (2, 10, 50, 200, 1000, 2000)
+TOPOLOGIES = ('perfect', 'braided')
+
+###############################################################################
+
+class Case(object):
+    """A maze to benchmark, with the inputs derived from it which some
+    functions take instead."""
+
+    def __init__(self, topology, rows, cols, seed, directory):
+        self.topology = topology
+        self.rows = rows
+        self.cols = cols
+        self.seed = seed
+        self.maze = generate_maze(rows, cols, seed, compact=True)
+        if topology == 'braided':
+            self.maze = braid_maze(self.maze, seed=seed)
+        self.point = self.maze.exit_point
+        self.text = visualise_maze(self.maze)
+        self.path = os.path.join(directory, '%s-%dx%d.maze'
+                                 % (topology, rows, cols))
+        save_maze(self.maze, self.path)
+
+
+def bench_generate_maze(case, options):
+    return(generate_maze(case.rows, case.cols, case.seed, compact=True))
+
+
+def bench_generate_maze_rows(case, options):
+    for row in generate_maze_rows(case.rows, case.cols, case.seed):
+        pass
+
+
+def bench_braid_maze(case, options):
+    return(braid_maze(case.maze, seed=case.seed))
+
+
+def bench_is_valid_maze(case, options):
+    return(is_valid_maze(case.maze))
+
+
+def bench_is_valid_maze_numpy(case, options):
+    return(is_valid_maze(case.maze, backend='numpy'))
+
+
+def bench_solve_maze(case, options):
+    return(solve_maze(case.maze))
+
+
+def bench_shortest_paths(case, options):
+    # Braided mazes may have more shortest paths than can be listed, so
+    # the search is cut short and reported as incomplete.
+    paths, complete = bounded_shortest_paths(case.maze, case.point,
+                                             timeout=options.search_timeout)
+    return(complete)
+
+
+def bench_count_shortest_paths(case, options):
+    return(count_shortest_paths(case.maze, case.point))
+
+
+def bench_visualise_maze(case, options):
+    return(visualise_maze(case.maze))
+
+
+def bench_parse_visual_maze(case, options):
+    return(parse_visual_maze(case.text, compact=True))
+
+
+def bench_save_maze(case, options):
+    save_maze(case.maze, case.path)
+
+
+def bench_load_maze(case, options):
+    return(load_maze(case.path, mapped=False))
+
+
+# Name, function and topologies of each benchmark. Generating a maze
+# does not depend on its topology, so it is only benchmarked once.
+BENCHMARKS = (
+    ('generate_maze', bench_generate_maze, ('perfect',)),
+    ('generate_maze_rows', bench_generate_maze_rows, ('perfect',)),
+    ('braid_maze', bench_braid_maze, ('braided',)),
+    ('is_valid_maze', bench_is_valid_maze, TOPOLOGIES),
+    ('is_valid_maze[numpy]', bench_is_valid_maze_numpy, TOPOLOGIES),
+    ('solve_maze', bench_solve_maze, TOPOLOGIES),
+    ('shortest_paths', bench_shortest_paths, TOPOLOGIES),
+    ('count_shortest_paths', bench_count_shortest_paths, TOPOLOGIES),
+    ('visualise_maze', bench_visualise_maze, TOPOLOGIES),
+    ('parse_visual_maze', bench_parse_visual_maze, TOPOLOGIES),
+    ('save_maze', bench_save_maze, TOPOLOGIES),
+    ('load_maze', bench_load_maze, TOPOLOGIES),
+)
+
+###############################################################################
+
+def run_benchmarks(options, log=None):
+    """Returns the report of a benchmark run with the given options as a
+    dictionary, writing a line to the text stream 'log' for each result
+    if given."""
+    results = []
+    directory = tempfile.mkdtemp(prefix='maze-benchmark-')
+    try:
+        for size in options.sizes:
+            for topology in options.topologies:
+                case = Case(topology, size, size, options.seed, directory)
+                for name, function, topologies in BENCHMARKS:
+                    if topology not in topologies or (
+                       options.functions and name not in options.functions):
+                        continue
+                    if name.endswith('[numpy]') and numpy is None:
+                        continue
+                    result = measure(function, case, options)
+                    result.update({'function': name, 'topology': topology,
+                                   'rows': size, 'cols': size})
+                    results.append(result)
+                    if log is not None:
+                        log.write('%-22s %-8s %5dx%-5d median %10.6fs  '
+                                  'peak %10d bytes\n'
+                                  % (name, topology, size, size,
+                                     result['median'], result['peak_memory']))
+                os.remove(case.path)
+    finally:
+        os.rmdir(directory)
+    return({'environment': environment(options), 'results': results})
+
+
+def measure(function, case, options):
+    """Returns a dictionary of the times of 'options.repeat' runs of a
+    benchmark function on a case, their median and 95th percentile, and
+    the peak memory allocated by one further run, in bytes."""
+    times = []
+    for run in range(options.repeat):
+        start = perf_counter()
+        value = function(case, options)
+        times.append(perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function(case, options)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    result = {'times': times, 'median': median(times),
+              'p95': percentile(times, 95), 'peak_memory': peak_memory}
+    if function is bench_shortest_paths:
+        result['complete'] = value
+    return(result)
+
+
+def percentile(values, percent):
+    """Returns the nearest-rank 'percent' percentile of the values."""
+    ordered = sorted(values)
+    return(ordered[max(0, int(ceil(percent / 100.0 * len(ordered))) - 1)])
+
+
+def environment(options):
+    """Returns a dictionary describing where and how the run was made."""
+    return({'date': strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'numpy': None if numpy is None else numpy.__version__,
+            'seed': options.seed, 'repeat': options.repeat,
+            'search_timeout': options.search_timeout})
+
+###############################################################################
+
+def parse_arguments(argv=None):
+    """Returns the options of a benchmark run from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                        type=lambda text: [int(size) for size
+                                           in text.split(',')],
+                        help='comma-separated side lengths of the square '
+                        'mazes (default: %(default)s)')
+    parser.add_argument('--topologies', default=','.join(TOPOLOGIES),
+                        type=lambda text: text.split(','),
+                        help='comma-separated maze topologies, of perfect '
+                        'and braided (default: %(default)s)')
+    parser.add_argument('--functions', default=None,
+                        type=lambda text: text.split(','),
+                        help='comma-separated functions to benchmark '
+                        '(default: all)')
+    parser.add_argument('--repeat', default=5, type=int,
+                        help='timed runs of each function (default: '
+                        '%(default)s)')
+    parser.add_argument('--seed', default=0, type=int,
+                        help='seed of the generated mazes (default: '
+                        '%(default)s)')
+    parser.add_argument('--search-timeout', default=10.0, type=float,
+                        help='seconds after which shortest_paths stops '
+                        'and is reported incomplete (default: %(default)s)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='file to write the JSON report to (default: '
+                        'standard output)')
+    options = parser.parse_args(argv)
+    unknown = set(options.topologies) - set(TOPOLOGIES)
+    if unknown:
+        parser.error('unknown topologies: %s' % ', '.join(sorted(unknown)))
+    names = set(name for name, function, topologies in BENCHMARKS)
+    unknown = set(options.functions or []) - names
+    if unknown:
+        parser.error('unknown functions: %s' % ', '.join(sorted(unknown)))
+    return(options)
+
+
+def write_report(report, path=None):
+    """Writes a report as JSON to the file at 'path', or to standard
+    output if 'path' is None."""
+    if path is None:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+        return
+    with open(path, 'w') as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
+        report_file.write('\n')
+
+
+def main(argv=None):
+    options = parse_arguments(argv)
+    write_report(run_benchmarks(options, log=sys.stderr), options.output)
+    return(0)
+
+###############################################################################
+
+if __name__ == '__main__':
+    sys.exit(main())
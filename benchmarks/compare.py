@@ -0,0 +1,252 @@
+"""Saves benchmark results as a baseline and compares later runs against
+it, flagging functions which became significantly slower or use more
+memory for a maze topology and size, and printing a table of the
+differences. Runs benchmark.py unless given a report it wrote.
+
+    python benchmarks/compare.py --save --sizes 2,10,50
+    python benchmarks/compare.py
+    python benchmarks/compare.py --input run.json
+"""
+import argparse
+import json
+import os
+import sys
+from math import erfc, sqrt
+
+from benchmark import parse_arguments, run_benchmarks, write_report
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'baseline.json')
+
+###############################################################################
+
+def baseline_from_report(report):
+    """Returns the baseline of a benchmark report: its environment and,
+    for each case, keyed by case_key, the times of its runs, their
+    median and 95th percentile and its peak memory."""
+    cases = {}
+    for result in report['results']:
+        cases[case_key(result)] = dict(
+            (field, result[field])
+            for field in ('times', 'median', 'p95', 'peak_memory'))
+    return({'environment': report['environment'], 'cases': cases})
+
+
+def case_key(result):
+    """Returns the key identifying the function, topology and size of a
+    benchmark result, such as 'solve_maze/perfect/200x200'."""
+    return('%s/%s/%dx%d' % (result['function'], result['topology'],
+                            result['rows'], result['cols']))
+
+
+def compare(baseline, current, alpha=0.01, threshold=0.1,
+            memory_threshold=0.1):
+    """Returns a list of the differences between the cases of two
+    baselines, as dictionaries holding the 'key' of the case, its
+    'baseline' and 'current' results (None if it is missing from one),
+    the 'p_value' of its runs being no slower than in the baseline if
+    its median time grew, or no faster otherwise, and its 'status':
+        'regression': its median time grew by more than 'threshold' and
+            the growth is significant at level 'alpha', or its peak
+            memory grew by more than 'memory_threshold',
+        'improvement': its median time shrank likewise,
+        'ok': neither, 'new' or 'missing': it is only in one baseline.
+    Cases are in the order of the current run, followed by any missing
+    from it."""
+    keys = list(current['cases'])
+    keys += sorted(set(baseline['cases']) - set(current['cases']))
+    differences = []
+    for key in keys:
+        old = baseline['cases'].get(key)
+        new = current['cases'].get(key)
+        difference = {'key': key, 'baseline': old, 'current': new,
+                      'p_value': None, 'status': 'new' if old is None
+                      else 'missing' if new is None else 'ok'}
+        differences.append(difference)
+        if difference['status'] != 'ok':
+            continue
+        slower = mann_whitney_p(new['times'], old['times'])
+        faster = mann_whitney_p(old['times'], new['times'])
+        difference['p_value'] = (slower if new['median'] >= old['median']
+                                 else faster)
+        # Memory is measured once per case, so any real growth counts,
+        # ignoring growth of under a kilobyte.
+        if (new['peak_memory'] > old['peak_memory'] * (1 + memory_threshold)
+           and new['peak_memory'] - old['peak_memory'] >= 1024):
+            difference['status'] = 'regression'
+        elif (new['median'] > old['median'] * (1 + threshold) and
+              slower < alpha):
+            difference['status'] = 'regression'
+        elif (new['median'] < old['median'] / (1 + threshold) and
+              faster < alpha):
+            difference['status'] = 'improvement'
+    return(differences)
+
+
+def mann_whitney_p(sample, other):
+    """Returns the one-sided p-value of the Mann-Whitney U test that the
+    values of 'sample' tend to be larger than those of 'other'. The
+    p-value is exact unless the samples share values, when the normal
+    approximation with a correction for ties is used instead."""
+    n, m = len(sample), len(other)
+    if n == 0 or m == 0:
+        return(1.0)
+    # Number of pairs in which the value from 'sample' is larger, with
+    # ties counting a half.
+    u = sum(1.0 if x > y else 0.5 if x == y else 0.0
+            for x in sample for y in other)
+    values = sorted(sample + other)
+    if len(set(values)) == len(values):
+        return(exact_u_tail(n, m, int(u)))
+    ties = sum(count ** 3 - count for count in
+               (values.count(value) for value in set(values)))
+    variance = n * m / 12.0 * ((n + m + 1) - ties / float((n + m) *
+                                                          (n + m - 1)))
+    if variance == 0:
+        return(1.0)
+    z = (u - 0.5 - n * m / 2.0) / sqrt(variance)
+    return(0.5 * erfc(z / sqrt(2)))
+
+
+def exact_u_tail(n, m, u):
+    """Returns the probability that the Mann-Whitney U statistic of
+    samples of sizes n and m drawn from one distribution is at least u,
+    counting the orderings of the samples giving each U."""
+    # ways[j][k]: orderings of i values of the sample and j of the other
+    # in which k pairs have the sample value larger, built up over i.
+    ways = [[1] + [0] * (n * m) for j in range(m + 1)]
+    for i in range(1, n + 1):
+        row = [[1] + [0] * (n * m)]
+        for j in range(1, m + 1):
+            # The largest value is from the sample, beating all j others,
+            # or from the other sample, beating none.
+            row.append([(ways[j][k - j] if k >= j else 0) + row[j - 1][k]
+                        for k in range(n * m + 1)])
+        ways = row
+    counts = ways[m]
+    return(sum(counts[u:]) / float(sum(counts)))
+
+###############################################################################
+
+def format_table(differences, show_all=False):
+    """Returns the differences as lines of a table, leaving out cases
+    with an 'ok' status unless 'show_all' is True."""
+    lines = ['%-44s %10s %10s %8s %8s %10s %10s  %s'
+             % ('case', 'base', 'current', 'change', 'p', 'base mem',
+                'cur mem', 'status')]
+    for difference in differences:
+        if difference['status'] == 'ok' and not show_all:
+            continue
+        old, new = difference['baseline'], difference['current']
+        p_value = difference['p_value']
+        lines.append('%-44s %10s %10s %8s %8s %10s %10s  %s' % (
+            difference['key'],
+            format_seconds(old and old['median']),
+            format_seconds(new and new['median']),
+            format_change(old and old['median'], new and new['median']),
+            '-' if p_value is None else '%.3f' % p_value,
+            format_bytes(old and old['peak_memory']),
+            format_bytes(new and new['peak_memory']),
+            difference['status']))
+    return(lines)
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return('-')
+    for scale, unit in ((1.0, 's'), (1e-3, 'ms'), (1e-6, 'us')):
+        if seconds >= scale:
+            return('%.3g%s' % (seconds / scale, unit))
+    return('%.3gns' % (seconds * 1e9))
+
+
+def format_bytes(size):
+    if size is None:
+        return('-')
+    for scale, unit in ((1 << 30, 'G'), (1 << 20, 'M'), (1 << 10, 'K')):
+        if size >= scale:
+            return('%.3g%s' % (size / float(scale), unit))
+    return('%dB' % size)
+
+
+def format_change(old, new):
+    if old is None or new is None or old == 0:
+        return('-')
+    return('%+.1f%%' % (100.0 * (new - old) / old))
+
+###############################################################################
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.split('\n\n')[0],
+        epilog='Other options are passed to benchmark.py, defaulting to '
+        'the sizes, seed and repeats of the baseline when comparing.')
+    parser.add_argument('--baseline', default=BASELINE,
+                        help='baseline file (default: %(default)s)')
+    parser.add_argument('--save', action='store_true',
+                        help='save the results as the baseline instead of '
+                        'comparing them')
+    parser.add_argument('--input', default=None,
+                        help='benchmark report to use instead of running '
+                        'the benchmarks')
+    parser.add_argument('--report', default=None,
+                        help='file to also write the benchmark report to')
+    parser.add_argument('--alpha', default=0.01, type=float,
+                        help='significance level of slowdowns, reachable '
+                        'with 5 or more repeats (default: %(default)s)')
+    parser.add_argument('--threshold', default=0.1, type=float,
+                        help='fraction by which the median time must grow '
+                        '(default: %(default)s)')
+    parser.add_argument('--memory-threshold', default=0.1, type=float,
+                        help='fraction by which the peak memory must grow '
+                        '(default: %(default)s)')
+    parser.add_argument('--all', action='store_true',
+                        help='list every case, not only changed ones')
+    options, benchmark_argv = parser.parse_known_args(argv)
+
+    baseline = None
+    if not options.save:
+        with open(options.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    if options.input is not None:
+        with open(options.input) as report_file:
+            report = json.load(report_file)
+    else:
+        # Reruns the cases of the baseline unless told otherwise.
+        defaults = []
+        if baseline is not None:
+            environment = baseline['environment']
+            sizes = sorted(set(int(key.rsplit('x', 1)[1])
+                               for key in baseline['cases']))
+            defaults = ['--sizes', ','.join(map(str, sizes)),
+                        '--seed', str(environment['seed']),
+                        '--repeat', str(environment['repeat']),
+                        '--search-timeout',
+                        str(environment['search_timeout'])]
+        report = run_benchmarks(parse_arguments(defaults + benchmark_argv),
+                                log=sys.stderr)
+    if options.report is not None:
+        write_report(report, options.report)
+
+    current = baseline_from_report(report)
+    if options.save:
+        with open(options.baseline, 'w') as baseline_file:
+            json.dump(current, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+        print('saved %d cases to %s' % (len(current['cases']),
+                                        options.baseline))
+        return(0)
+
+    differences = compare(baseline, current, options.alpha,
+                          options.threshold, options.memory_threshold)
+    for line in format_table(differences, options.all):
+        print(line)
+    regressions = sum(1 for difference in differences
+                      if difference['status'] == 'regression')
+    print('%d cases, %d regressions' % (len(differences), regressions))
+    return(1 if regressions > 0 else 0)
+
+###############################################################################
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,10 +20,17 @@ setup(
     keywords=[
         'COMP10001'
     ],
-    scripts=[
-        'src/recursive_backtracker'
-    ],
-    packages=[],
+    package_dir={'': 'src'},
+    py_modules=['recursive_backtracker'],
+    entry_points={
+        'console_scripts': [
+            'recursive-backtracker = recursive_backtracker:main'
+        ]
+    },
+    python_requires='>=3.7',
+    extras_require={
+        'numpy': ['numpy']
+    },
     zip_safe=False,
     include_package_data=True
 )
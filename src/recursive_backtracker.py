@@ -1,32 +1,496 @@
 DIRECTIONS = (U, R, D, L) = (0, 1, 2, 3)
-from collections import defaultdict
+import argparse
+import json
+import os
+import signal
+import sys
+from array import array
+from ast import literal_eval
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from heapq import heappop, heappush
+from itertools import chain, islice
+from mmap import ACCESS_READ, mmap
+from queue import Empty, Queue
+from random import Random
+from struct import Struct
+from threading import Event, Thread
+from time import perf_counter
+
+# NumPy is optional and only used by the 'numpy' validation backend.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Every possible cell configuration, indexed by its 4-bit opening mask where
+# bit 'direction' is set if the cell is open in that direction.
+CELLS = tuple(tuple(bool(mask & (1 << direction)) for direction in DIRECTIONS)
+              for mask in range(16))
+# Maps each cell configuration back to its opening mask.
+CELL_MASKS = dict((cell, mask) for mask, cell in enumerate(CELLS))
+# Direction opposite each direction.
+OPPOSITE = (D, L, U, R)
+# Two characters drawing each cell configuration, indexed by its mask:
+# a space for a path downwards and an underscore otherwise, followed by
+# a space for a path to the right and a pipe character otherwise.
+CELL_GLYPHS = tuple((' ' if mask & 1 << D else '_') +
+                    (' ' if mask & 1 << R else '|') for mask in range(16))
+# Translation table clearing all but the opening bits of a mask, which
+# also reads the mask packed into the low half of a byte.
+OPENINGS_ONLY = bytes(bytearray(mask & 15 for mask in range(256)))
+# Translation tables reading the mask packed into the high half of a
+# byte, and moving a mask into the high half.
+HIGH_NIBBLES = bytes(bytearray(byte >> 4 for byte in range(256)))
+SHIFTED_NIBBLES = bytes(bytearray((byte & 15) << 4 for byte in range(256)))
+# Translation tables reading one opening from each character of a
+# rendered maze, where a space marks an opening.
+SPACE_TO = tuple(bytes(bytearray(1 << direction if byte == 32 else 0
+                                 for byte in range(256)))
+                 for direction in DIRECTIONS)
+
+# Header of a maze file: magic bytes, format version, number of rows
+# and columns, and the columns of the entry and exit points, followed
+# by the cells packed two to a byte, the first of each pair in the low
+# half of the byte.
+MAZE_FILE_HEADER = Struct('<4sHxxIIII')
+MAZE_FILE_MAGIC = b'RBMZ'
+MAZE_FILE_VERSION = 1
+# Entry or exit column recorded for a maze which has none.
+NO_OPENING = 0xFFFFFFFF
+
+# Kinds of event in a solver trace, each traced as a 4-tuple of the kind,
+# the row and column of the cell, and the number of cells on the path,
+# which for a solution are those of the exit point and its length.
+TRACE_VISIT, TRACE_JUNCTION, TRACE_BACKTRACK, TRACE_SOLUTION = range(4)
+# Header of a trace file: magic bytes, format version and the number of
+# integers in each event, followed by the events as 32-bit little-endian
+# signed integers.
+TRACE_FILE_HEADER = Struct('<4sHH')
+TRACE_FILE_MAGIC = b'RBTR'
+TRACE_FILE_VERSION = 1
+
+# Order in which solve_maze tries the direction it is facing, and for
+# each direction it moves in: the directions it turns to on meeting a
+# wall, on leaving the maze, and by default after moving, and the two
+# sides it checks after moving.
+SOLVE_ORDER = (R, L, D, U)
+SOLVE_BLOCKED = (R, D, L, U)
+SOLVE_OUTSIDE = (L, U, R, D)
+SOLVE_DEFAULT = (U, R, D, U)
+SOLVE_SIDES = ((R, L), (U, D), (L, R), (U, D))
 
 ###############################################################################
 
-def is_valid_maze(maze):
-    """Returns True if the maze is valid, False otherwise."""
-    # Asserts each constraint and returns False if any are not met.
-    if not constraint_0(maze):
-        return(False)
-    if not constraint_1(maze):
-        return(False)
-    if not constraint_2(maze):
-        return(False)
-    if not constraint_3(maze):
-        return(False)
-    if not constraint_4(maze):
-        return(False)
-    if constraint_5(maze) is False:
-        return(False)
-    if constraint_6(maze) is False:
-        return(False)
-    if constraint_7(maze) is False:
-        return(False)
-    if constraint_8a(maze) is False:
-        return(False)
-    if constraint_8b(maze) is False:
+class Maze(object):
+    """Compact maze storing each cell as a 4-bit opening mask in a flat
+    bytearray, row by row. Behaves as a sequence of rows of (U, R, D, L)
+    tuples so that it can be passed to any function expecting a maze."""
+
+    def __init__(self, rows, cols, data=None):
+        self.rows = rows
+        self.cols = cols
+        # One byte per cell, cell (row, col) is stored at row * cols + col.
+        self.data = bytearray(rows * cols) if data is None else data
+        if len(self.data) != rows * cols:
+            raise ValueError('expected %d cells, got %d'
+                             % (rows * cols, len(self.data)))
+        # Entry and exit points, located on first use.
+        self._entry_point = None
+        self._exit_point = None
+
+    @classmethod
+    def from_list(cls, maze):
+        """Returns a Maze holding the same cells as a list of rows of
+        (U, R, D, L) tuples."""
+        rows = len(maze)
+        cols = len(maze[0]) if rows > 0 else 0
+        data = bytearray(rows * cols)
+        for row_num, row in enumerate(maze):
+            if len(row) != cols:
+                raise ValueError('row %d has %d cells, expected %d'
+                                 % (row_num, len(row), cols))
+            try:
+                try:
+                    masks = [CELL_MASKS[cell] for cell in row]
+                except TypeError:
+                    # Cells decoded from JSON are lists, which cannot be
+                    # looked up.
+                    masks = [CELL_MASKS[tuple(map(bool, cell))]
+                             for cell in row]
+            except (KeyError, TypeError):
+                raise ValueError('row %d contains a cell which is not a '
+                                 '(U, R, D, L) tuple' % row_num)
+            data[row_num * cols:(row_num + 1) * cols] = bytes(masks)
+        return(cls(rows, cols, data))
+
+    def to_list(self):
+        """Returns the maze as a list of rows of (U, R, D, L) tuples."""
+        return([list(row) for row in self])
+
+    def mask(self, row_num, cell_num):
+        """Returns the opening mask of the cell at (row_num, cell_num)."""
+        return(self.data[row_num * self.cols + cell_num])
+
+    @property
+    def entry_point(self):
+        """The first cell of the first row open upwards, as a 2-tuple."""
+        if self._entry_point is None:
+            self._entry_point = (0, self._first_opening(0, U))
+        return(self._entry_point)
+
+    @property
+    def exit_point(self):
+        """The first cell of the last row open downwards, as a 2-tuple."""
+        if self._exit_point is None:
+            self._exit_point = (self.rows - 1,
+                                self._first_opening(self.rows - 1, D))
+        return(self._exit_point)
+
+    def _first_opening(self, row_num, direction):
+        # Scans the masks of one row for the first cell open in direction.
+        bit = 1 << direction
+        start = row_num * self.cols
+        for cell_num in range(self.cols):
+            if self.data[start + cell_num] & bit:
+                return(cell_num)
+        raise IndexError('no cell in row %d is open in direction %d'
+                         % (row_num, direction))
+
+    def __len__(self):
+        return(self.rows)
+
+    def __getitem__(self, row_num):
+        # Rows are decoded on demand into tuples of shared cell tuples.
+        if isinstance(row_num, slice):
+            return([self[i] for i in range(*row_num.indices(self.rows))])
+        if row_num < 0:
+            row_num += self.rows
+        if not 0 <= row_num < self.rows:
+            raise IndexError('maze row out of range')
+        start = row_num * self.cols
+        return(tuple([CELLS[mask] for mask in
+                      self.data[start:start + self.cols]]))
+
+    def __iter__(self):
+        for row_num in range(self.rows):
+            yield self[row_num]
+
+    def __eq__(self, other):
+        if isinstance(other, Maze):
+            return(self.rows == other.rows and self.cols == other.cols and
+                   self.data == other.data)
+        return(NotImplemented)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return(equal if equal is NotImplemented else not equal)
+
+    def __repr__(self):
+        return('Maze(%d, %d)' % (self.rows, self.cols))
+
+###############################################################################
+
+class PackedCells(object):
+    """Read-only sequence of the opening masks of a maze packed two to a
+    byte in a buffer, such as a memory mapped maze file, starting at
+    'offset'. Used as the data of a Maze, it is indexed and sliced like
+    the bytearray it replaces, unpacking only the cells requested."""
+
+    def __init__(self, buffer, size, offset=0):
+        self.buffer = buffer
+        self.size = size
+        self.offset = offset
+
+    def unpack(self):
+        """Returns every mask as a bytearray, one byte per cell."""
+        return(self[:])
+
+    def __len__(self):
+        return(self.size)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.size)
+            if step != 1:
+                return(bytearray([self[i] for i in
+                                  range(start, stop, step)]))
+            if stop <= start:
+                return(bytearray())
+            # Unpacks the whole bytes covering the slice and trims them.
+            first = self.offset + (start >> 1)
+            masks = unpack_cells(self.buffer[first:self.offset +
+                                             ((stop + 1) >> 1)])
+            return(masks[start & 1:(start & 1) + stop - start])
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError('cell index out of range')
+        byte = self.buffer[self.offset + (index >> 1)]
+        return(byte >> 4 if index & 1 else byte & 15)
+
+    def __iter__(self):
+        return(iter(self[:]))
+
+    def __eq__(self, other):
+        if isinstance(other, (PackedCells, bytes, bytearray)):
+            return(self[:] == other[:])
+        return(NotImplemented)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return(equal if equal is NotImplemented else not equal)
+
+    def __reduce__(self):
+        # Memory maps cannot be pickled, so the masks are sent unpacked.
+        return((bytearray, (bytes(self.unpack()),)))
+
+
+def pack_cells(masks):
+    """Returns a bytes object holding the opening masks of 'masks' two to
+    a byte, the first of each pair in the low half of the byte."""
+    low = bytes(masks[0::2]).translate(OPENINGS_ONLY)
+    high = bytes(masks[1::2]).translate(SHIFTED_NIBBLES)
+    # Combines both halves at once as little-endian integers.
+    return((int.from_bytes(low, 'little') |
+            int.from_bytes(high, 'little')).to_bytes(len(low), 'little'))
+
+
+def unpack_cells(packed):
+    """Returns a bytearray of the opening masks packed two to a byte in
+    'packed', two cells for every byte."""
+    masks = bytearray(2 * len(packed))
+    masks[0::2] = packed.translate(OPENINGS_ONLY)
+    masks[1::2] = packed.translate(HIGH_NIBBLES)
+    return(masks)
+
+
+def save_maze(maze, path):
+    """Writes the maze to the file at 'path' in the binary maze format: a
+    header giving its size and the columns of its entry and exit points,
+    followed by its cells at 4 bits each."""
+    grid = as_maze(maze)
+    ends = []
+    for end in ('entry_point', 'exit_point'):
+        try:
+            ends.append(getattr(grid, end)[1])
+        except IndexError:
+            ends.append(NO_OPENING)
+    with open(path, 'wb') as maze_file:
+        maze_file.write(MAZE_FILE_HEADER.pack(
+            MAZE_FILE_MAGIC, MAZE_FILE_VERSION, grid.rows, grid.cols, *ends))
+        maze_file.write(pack_cells(grid.data))
+
+
+def load_maze(path, mapped=True):
+    """Returns the maze stored in the binary maze format in the file at
+    'path' as a Maze. The file is memory mapped, and if 'mapped' is True
+    the cells are read from the map as they are needed, so that the file
+    is never copied into memory. Otherwise they are unpacked into a
+    bytearray at once, which is faster to solve repeatedly. Raises
+    ValueError if the file is not exactly one maze in that format."""
+    with open(path, 'rb') as maze_file:
+        try:
+            mapping = mmap(maze_file.fileno(), 0, access=ACCESS_READ)
+        except ValueError:
+            raise ValueError('%s is empty, not a maze file' % path)
+    if len(mapping) < MAZE_FILE_HEADER.size:
+        raise ValueError('%s is too short to be a maze file' % path)
+    magic, version, rows, cols, entry, exit = MAZE_FILE_HEADER.unpack_from(
+        mapping)
+    if magic != MAZE_FILE_MAGIC:
+        raise ValueError('%s is not a maze file' % path)
+    if version != MAZE_FILE_VERSION:
+        raise ValueError('%s has unsupported maze file version %d'
+                         % (path, version))
+    size = rows * cols
+    end = MAZE_FILE_HEADER.size + (size + 1) // 2
+    if len(mapping) < end:
+        raise ValueError('%s holds fewer than %d cells' % (path, size))
+    if len(mapping) > end:
+        raise ValueError('%s holds more than one maze or %d bytes after '
+                         'its cells' % (path, len(mapping) - end))
+    if mapped:
+        data = PackedCells(mapping, size, MAZE_FILE_HEADER.size)
+    else:
+        data = unpack_cells(mapping[MAZE_FILE_HEADER.size:end])[:size]
+        mapping.close()
+    return(file_maze(rows, cols, data, entry, exit))
+
+
+def file_maze(rows, cols, data, entry, exit):
+    """Returns a Maze of the cells 'data' read from a binary maze file,
+    whose header gave the columns 'entry' and 'exit' of its entry and
+    exit points. They save scanning for the points if the cells are open
+    there, and are ignored otherwise."""
+    grid = Maze(rows, cols, data)
+    if (rows > 0 and entry < cols and exit < cols and data[entry] & 1 and
+       data[(rows - 1) * cols + exit] & 4):
+        grid._entry_point = (0, entry)
+        grid._exit_point = (rows - 1, exit)
+    return(grid)
+
+
+def read_maze_file(path, maze_format='auto'):
+    """Returns the maze in the file at 'path', which may be in the binary
+    maze format, drawn by visualise_maze, or a Python literal list of
+    rows of (U, R, D, L) tuples. Binary and drawn mazes are returned as
+    a Maze and literals as a list of rows. The format is detected unless
+    'maze_format' is 'binary' or 'text', when the file is read as such."""
+    if maze_format == 'binary':
+        return(load_maze(path, mapped=False))
+    if maze_format != 'text' and is_binary_maze_file(path):
+        return(load_maze(path, mapped=False))
+    with open(path) as maze_file:
+        text = maze_file.read()
+    if maze_format != 'text' and text.lstrip().startswith('['):
+        return(literal_eval(text))
+    return(parse_visual_maze(text, compact=True))
+
+
+def is_binary_maze_file(path):
+    """Returns True if the file at 'path' starts as a binary maze file."""
+    with open(path, 'rb') as maze_file:
+        return(maze_file.read(len(MAZE_FILE_MAGIC)) == MAZE_FILE_MAGIC)
+
+
+def read_binary_mazes(stream):
+    """Yields each maze in a binary stream, such as standard input, made
+    of mazes in the binary maze format one after another, as a Maze.
+    Raises ValueError if the stream holds anything else."""
+    while True:
+        header = stream.read(MAZE_FILE_HEADER.size)
+        if len(header) == 0:
+            return
+        if len(header) < MAZE_FILE_HEADER.size:
+            raise ValueError('stream ends within a maze header')
+        magic, version, rows, cols, entry, exit = MAZE_FILE_HEADER.unpack(
+            header)
+        if magic != MAZE_FILE_MAGIC or version != MAZE_FILE_VERSION:
+            raise ValueError('stream holds something other than a maze')
+        packed = stream.read((rows * cols + 1) // 2)
+        if len(packed) < (rows * cols + 1) // 2:
+            raise ValueError('stream ends within a maze')
+        yield(file_maze(rows, cols, unpack_cells(packed)[:rows * cols],
+                        entry, exit))
+
+###############################################################################
+
+def is_valid_maze(maze, backend='python'):
+    """Returns True if the maze is valid, False otherwise. The 'python'
+    backend also accepts any iterable of rows, which it reads once. The
+    'numpy' backend checks each constraint as an array operation, and
+    falls back to the 'python' backend when NumPy is not installed."""
+    if backend == 'numpy':
+        if numpy is not None:
+            return(is_valid_maze_numpy(maze))
+    elif backend != 'python':
+        raise ValueError('unknown validation backend %r' % (backend,))
+    # Checks every constraint in a single pass over the maze.
+    return(find_violation(maze) is None)
+
+
+def is_valid_maze_numpy(maze):
+    """Returns True if the maze is valid, False otherwise, evaluating
+    the constraints as vectorised operations on a NumPy array."""
+    # Constraints 0 and 1 must hold before the maze forms an array.
+    if not constraint_0(maze) or not constraint_1(maze):
         return(False)
-    return(True)
+    grid = maze_array(maze)
+    up, right, down, left = (grid[:, :, U], grid[:, :, R],
+                             grid[:, :, D], grid[:, :, L])
+    return(bool(
+        # Constraints 2 and 3: unique entry and exit points.
+        up[0].sum() == 1 and down[-1].sum() == 1 and
+        # Constraint 4: no openings out of the sides.
+        not left[:, 0].any() and not right[:, -1].any() and
+        # Constraint 5: each cell is open in at least one direction.
+        grid.any(axis=2).all() and
+        # Constraints 6 and 7: upward and downward paths in each row.
+        down.any(axis=1).all() and up.any(axis=1).all() and
+        # Constraints 8a and 8b: symmetry between adjacent cells.
+        not (right[:, :-1] & ~left[:, 1:]).any() and
+        not (left & ~numpy.roll(right, 1, axis=1)).any()))
+
+
+def maze_array(maze):
+    """Returns the maze as a NumPy boolean array of shape (rows, columns,
+    4), indexed by (row, column, direction)."""
+    if isinstance(maze, Maze):
+        data = maze.data
+        if isinstance(data, PackedCells):
+            data = data.unpack()
+        masks = numpy.frombuffer(data, dtype=numpy.uint8)
+        masks = masks.reshape(maze.rows, maze.cols, 1)
+        return((masks >> numpy.arange(4, dtype=numpy.uint8)) & 1 == 1)
+    return(numpy.array(maze, dtype=bool).reshape(len(maze), len(maze[0]), 4))
+
+
+def find_violation(maze):
+    """Returns the first constraint violated by the maze as a 2-tuple of
+    the constraint name and the offending (row, column) coordinate, or
+    None if the maze is valid. Constraints concerning a whole row report
+    a column of None, and constraint_0 reports a coordinate of None.
+    The maze may be any iterable of rows, such as a generator reading
+    them from a file, and only the current row is held at a time."""
+    # Length of the first row, or None if there are no rows yet.
+    width = None
+    # Number of openings out of the bottom of the most recent row.
+    down_count = 0
+
+    for row_num, row in enumerate(maze):
+        if width is None:
+            width = len(row)
+        # Constraint 1: rows are of equal length and not empty.
+        if len(row) < 1 or len(row) != width:
+            return(('constraint_1', (row_num, None)))
+        # Constraint 4: no openings out of the sides of the maze.
+        if row[0][L] is True:
+            return(('constraint_4', (row_num, 0)))
+        if row[-1][R] is True:
+            return(('constraint_4', (row_num, width - 1)))
+
+        up_count = 0
+        down_count = 0
+        previous = None
+        for cell_num, cell in enumerate(row):
+            if cell[U] is True:
+                up_count += 1
+            if cell[D] is True:
+                down_count += 1
+            # Constraint 5: each cell is open in at least one direction.
+            if (cell[U] is False and cell[R] is False and
+               cell[D] is False and cell[L] is False):
+                return(('constraint_5', (row_num, cell_num)))
+            if previous is not None:
+                # Constraint 8a: openings to the right are matched by the
+                # right adjacent cell.
+                if previous[R] is True and cell[L] is False:
+                    return(('constraint_8a', (row_num, cell_num - 1)))
+                # Constraint 8b: openings to the left are matched by the
+                # left adjacent cell.
+                if cell[L] is True and previous[R] is False:
+                    return(('constraint_8b', (row_num, cell_num)))
+            previous = cell
+
+        # Constraint 2: unique entry point in the first row.
+        if row_num == 0 and up_count != 1:
+            return(('constraint_2', (row_num, None)))
+        # Constraint 6: at least one downward path out of each row.
+        if down_count == 0:
+            return(('constraint_6', (row_num, None)))
+        # Constraint 7: at least one upward path out of each row.
+        if up_count == 0:
+            return(('constraint_7', (row_num, None)))
+
+    # Constraint 0: the maze is not empty.
+    if width is None:
+        return(('constraint_0', None))
+    # Constraint 3: unique exit point in the last row.
+    if down_count != 1:
+        return(('constraint_3', (row_num, None)))
+    return(None)
 
 
 def constraint_0(maze):
@@ -106,1590 +570,1803 @@ def constraint_8b(maze):
                          range(0, len(row)) if row[i][L] is True
                          and row[i - 1][R] is False]) > 0 else True)
 
+
+def validation_report(maze, timings=None):
+    """Returns a dictionary with 'valid', True if the maze is valid, and
+    'violations', a list of every violated constraint as a 2-tuple of
+    the constraint name and offending coordinate. If 'timings' is a
+    dictionary, the seconds spent checking each constraint are added to
+    it under the constraint name, so it may accumulate over many mazes."""
+    violations = []
+    for name, function in CONSTRAINT_VIOLATIONS:
+        start = perf_counter()
+        coordinates = function(maze)
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + perf_counter() - start
+        violations.extend((name, coordinate) for coordinate in coordinates)
+        # Remaining constraints index rows and cells which may not exist.
+        if coordinates and name in ('constraint_0', 'constraint_1'):
+            break
+    return({'valid': len(violations) == 0, 'violations': violations})
+
+
+def violations_0(maze):
+    """Returns [None] if the maze is empty."""
+    return([None] if len(maze) == 0 else [])
+
+
+def violations_1(maze):
+    """Returns coordinates of rows which are empty or of unequal length."""
+    return([(row_num, None) for row_num, row in enumerate(maze)
+            if len(row) < 1 or len(row) != len(maze[0])])
+
+
+def violations_2(maze):
+    """Returns the coordinate of the first row without a unique entry."""
+    return([(0, None)] if len([True for cell in maze[0]
+                               if cell[U] is True]) != 1 else [])
+
+
+def violations_3(maze):
+    """Returns the coordinate of the last row without a unique exit."""
+    return([(len(maze) - 1, None)] if len([True for cell in maze[-1]
+                                           if cell[D] is True]) != 1 else [])
+
+
+def violations_4(maze):
+    """Returns coordinates of cells open out of the sides of the maze."""
+    coordinates = []
+    for row_num, row in enumerate(maze):
+        if row[0][L] is True:
+            coordinates.append((row_num, 0))
+        if row[-1][R] is True:
+            coordinates.append((row_num, len(row) - 1))
+    return(coordinates)
+
+
+def violations_5(maze):
+    """Returns coordinates of cells which are closed in every direction."""
+    return([(row_num, cell_num) for row_num, row in enumerate(maze)
+            for cell_num, cell in enumerate(row)
+            if len([False for direction in cell if direction is False]) == 4])
+
+
+def violations_6(maze):
+    """Returns coordinates of rows without a downward path."""
+    return([(row_num, None) for row_num, row in enumerate(maze)
+            if not [True for cell in row if cell[D] is True]])
+
+
+def violations_7(maze):
+    """Returns coordinates of rows without an upward path."""
+    return([(row_num, None) for row_num, row in enumerate(maze)
+            if not [True for cell in row if cell[U] is True]])
+
+
+def violations_8a(maze):
+    """Returns coordinates of cells open to the right whose right
+    adjacent cell is closed to the left."""
+    return([(row_num, i) for row_num, row in enumerate(maze)
+            for i in range(len(row) - 1)
+            if row[i][R] is True and row[i + 1][L] is False])
+
+
+def violations_8b(maze):
+    """Returns coordinates of cells open to the left whose left adjacent
+    cell is closed to the right."""
+    return([(row_num, i) for row_num, row in enumerate(maze)
+            for i in range(len(row))
+            if row[i][L] is True and row[i - 1][R] is False])
+
+
+# Functions locating violations of each constraint, in order of checking.
+CONSTRAINT_VIOLATIONS = (
+    ('constraint_0', violations_0),
+    ('constraint_1', violations_1),
+    ('constraint_2', violations_2),
+    ('constraint_3', violations_3),
+    ('constraint_4', violations_4),
+    ('constraint_5', violations_5),
+    ('constraint_6', violations_6),
+    ('constraint_7', violations_7),
+    ('constraint_8a', violations_8a),
+    ('constraint_8b', violations_8b),
+)
+
+
 ###############################################################################
 
 def get_entry_point(maze):
     """Returns a 2-tuple of integers identifying the unique entry point"""
-    # Indexes the first row of the maze and asserts 'UP' direction is True.
-    return(0, (maze[0].index([cell for cell in maze[0] if cell[U]][0])))
+    # Maze objects locate their entry point once and cache it.
+    if isinstance(maze, Maze):
+        return(maze.entry_point)
+    # Finds the first cell of the first row with 'UP' direction True.
+    return(0, first_opening(maze[0], U))
 
 ###############################################################################
 
 def get_exit_point(maze):
     """Returns a 2-tuple of integers identifying the unique exit point."""
-    # Indexes the last row of the maze and asserts True 'DOWN' direction.
-    return(len(maze) - 1, (maze[-1].index([cell for cell in maze[-1]
-                                           if cell[D]][0])))
+    # Maze objects locate their exit point once and cache it.
+    if isinstance(maze, Maze):
+        return(maze.exit_point)
+    # Finds the first cell of the last row with 'DOWN' direction True.
+    return(len(maze) - 1, first_opening(maze[-1], D))
+
+
+def first_opening(row, direction):
+    """Returns the index of the first cell in the row which is open in
+    the given direction."""
+    for cell_num, cell in enumerate(row):
+        if cell[direction]:
+            return(cell_num)
+    raise IndexError('no cell in the row is open in direction %d'
+                     % direction)
 
 ###############################################################################
 
-def visualise_maze(maze):
-    """Returns a string-based representation of the maze."""
-    # Top edge of the maze as a single underscore character string.
-    visual = '_'
-
-    # Top edge of the first row of the maze made up of two spaces for
-    # entry point(s), two underscore characters otherwise.
-    for cell in maze[0]:
-        visual += ('  ' if cell[U] else '__')
-    visual += '\n'
+def visualise_maze(maze, paths=None, row_range=None, col_range=None,
+                   marker='*'):
+    """Returns a string-based representation of the maze. Cells on any of
+    'paths', lists of (row, column) coordinates such as those returned by
+    solve_maze and shortest_paths, are drawn with 'marker' in place of
+    their floor. 'row_range' and 'col_range' draw only a window of the
+    maze, given as (start, stop) pairs of row and column numbers, which
+    are read as the bounds of a slice. Raises IndexError if the window
+    holds no cells."""
+    return(''.join(visual_lines(maze, paths, row_range, col_range, marker)))
+
+
+def write_visual_maze(maze, stream, paths=None, row_range=None,
+                      col_range=None, marker='*'):
+    """Writes the string-based representation of the maze, as drawn by
+    visualise_maze, to a writable text stream, such as a file or
+    socket.makefile('w'), one line at a time. If the maze is an iterable
+    of rows, such as the generator of generate_maze_rows, only one row
+    is held in memory at a time."""
+    for line in visual_lines(maze, paths, row_range, col_range, marker):
+        stream.write(line)
+
+
+def visual_lines(maze, paths=None, row_range=None, col_range=None,
+                 marker='*'):
+    """Yields each line of the string-based representation of the maze,
+    as drawn by visualise_maze, terminated by a newline character,
+    starting with the top edge."""
+    # Coordinates of every cell on the paths, looked up once per cell.
+    marked = set(cell for path in paths or [] if path for cell in path)
+    row_start, row_stop = row_range or (0, None)
+    if hasattr(maze, '__len__'):
+        row_start, row_stop = slice(row_start, row_stop).indices(
+            len(maze))[:2]
+    elif (row_start or 0) < 0 or (row_stop or 0) < 0:
+        raise ValueError('rows of a maze read one at a time cannot be '
+                         'counted from its end')
+    empty = ('the window of the maze holds no cells'
+             if row_range or col_range else
+             'a maze without cells cannot be visualised')
+    rows = islice(enumerate(maze), row_start, row_stop)
+    first_row = next(rows, None)
+    if first_row is None:
+        raise IndexError(empty)
+    row_num, row = first_row
+    col_start, col_stop = slice(*(col_range or (0, None))).indices(
+        len(row))[:2]
+    if col_start >= col_stop:
+        raise IndexError(empty)
+
+    # Top edge of the maze as a single underscore character string,
+    # followed by two spaces for entry point(s) and two underscore
+    # characters otherwise.
+    yield('_' + ''.join(['  ' if cell[U] else '__'
+                         for cell in row[col_start:col_stop]]) + '\n')
 
     # Each row corresponds to each line in the output after the top edge,
     # terminated by newline character.
-    for row in maze:
-        # Pipe character for left wall of the row.
-        visual += ('|' if not row[0][L] else '')
-
-        # Marks paths down the maze with single spaces.
-        # Marks cells with both path downwards and right with two spaces,
-        # single underscore otherwise.
-        # Marks cells with only right direction with single underscore
-        # followed by single space.
-        # Marks paths to the right of the cell with pipe character.
-        for cell in row:
-            visual += (' ' if cell[D] and not cell[R] else '')
-            visual += ('  ' if cell[D] and cell[R] else '')
-            visual += ('_' if not cell[D] and not cell[R] else '')
-            visual += ('_ ' if not cell[D] and cell[R] else '')
-            visual += ('|' if cell[R] is False else '')
-        visual += '\n'
+    yield(visual_row(row[col_start:col_stop], row_num, col_start, marked,
+                     marker))
+    for row_num, row in rows:
+        yield(visual_row(row[col_start:col_stop], row_num, col_start,
+                         marked, marker))
+
+
+def visual_row(cells, row_num=0, col_start=0, marked=(), marker='*'):
+    """Returns the line representing cells of row 'row_num' from column
+    'col_start', made of a pipe character for the wall to their left and
+    the glyph of each cell, with 'marker' as the floor of the cells whose
+    coordinates are in 'marked'."""
+    try:
+        glyphs = [CELL_GLYPHS[CELL_MASKS[cell]] for cell in cells]
+    except TypeError:
+        # Cells decoded from JSON are lists, which cannot be looked up.
+        glyphs = [CELL_GLYPHS[CELL_MASKS[tuple(map(bool, cell))]]
+                  for cell in cells]
+    if marked:
+        for cell_num, glyph in enumerate(glyphs):
+            if (row_num, col_start + cell_num) in marked:
+                glyphs[cell_num] = marker + glyph[1]
+    # A window starting inside the maze may be open to its left.
+    left = '|' if not cells[0][L] else ('' if col_start == 0 else ' ')
+    return(left + ''.join(glyphs) + '\n')
+
+###############################################################################
 
-    return(visual)
+def parse_visual_maze(text, compact=False):
+    """Returns the maze drawn by visualise_maze in 'text', a string or an
+    iterable of lines such as an open file, as a list of rows of
+    (U, R, D, L) tuples or as a Maze if 'compact' is True. Cells drawn
+    with a path marker cannot be read back. Raises ValueError if the
+    text is not a maze drawn by visualise_maze."""
+    masks = iter_visual_masks(text)
+    first_row = next(masks, None)
+    if first_row is None:
+        return(Maze(0, 0) if compact else [])
+    if not compact:
+        return([list(map(CELLS.__getitem__, row))
+                for row in chain([first_row], masks)])
+    data = bytearray(first_row)
+    for row in masks:
+        data += row
+    return(Maze(len(data) // len(first_row), len(first_row), data))
+
+
+def iter_visual_rows(text):
+    """Yields the rows of the maze drawn by visualise_maze in 'text' one
+    at a time, as lists of (U, R, D, L) tuples, reading one line ahead
+    of each row. See parse_visual_maze."""
+    for row in iter_visual_masks(text):
+        yield(list(map(CELLS.__getitem__, row)))
+
+
+def iter_visual_masks(text):
+    """Yields the opening masks of each row of the maze drawn by
+    visualise_maze in 'text' as a bytes object. Each line is decoded as
+    a whole: the openings of every cell are read off its characters with
+    translation tables, and those read off each character are combined
+    as the bits of one integer. The openings up from a row are those
+    down from the row above, and the opening left of a cell is the
+    opening right of the cell before it. Blank lines are skipped."""
+    lines = text.splitlines() if isinstance(text, str) else text
+    cols = None
+    for line_num, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n').encode('latin-1')
+        if len(line) == 0:
+            continue
+        if cols is None:
+            # Top edge: an underscore followed by a pair of spaces over
+            # each entry point and a pair of underscores over each cell.
+            cols = (len(line) - 1) // 2
+            if (cols < 1 or len(line) % 2 == 0 or line[:1] != b'_' or
+               line[1::2] != line[2::2] or
+               line[1::2].translate(None, b' _')):
+                raise ValueError('line %d is not the top edge of a maze'
+                                 % line_num)
+            up = int.from_bytes(line[1::2].translate(SPACE_TO[U]), 'little')
+            continue
+
+        # Each row is a pipe character for the wall to the left of the
+        # first cell, left out or a space where it is open, then a
+        # floor character and a right wall character for each cell.
+        if len(line) == 2 * cols:
+            line = b' ' + line
+        if len(line) != 2 * cols + 1:
+            raise ValueError('line %d has %d characters, expected %d'
+                             % (line_num, len(line), 2 * cols + 1))
+        floors = line[1::2]
+        walls = line[::2]
+        if floors.translate(None, b' _') or walls.translate(None, b' |'):
+            raise ValueError('line %d is not a row of a maze' % line_num)
+        down = int.from_bytes(floors.translate(SPACE_TO[D]), 'little')
+        yield((up | down |
+               int.from_bytes(walls[1:].translate(SPACE_TO[R]), 'little') |
+               int.from_bytes(walls[:-1].translate(SPACE_TO[L]), 'little')
+               ).to_bytes(cols, 'little'))
+        up = down >> 2
 
 ###############################################################################
 
-def solve_maze(maze):
+def solve_maze(maze, stats=None):
     """Returns the path through the maze (if available) using an
     algorithm where each cell visited is traversed via possible
     paths based on cell configuration, backtracking steps to entry
     point when encountered with a dead end. Algorithm stops when exit
     point is found, or when back at entry point with all paths traversed.
     Algorithm is notably similar to Tremaux's Algorithm: http://en.wiki
-    pedia.org/wiki/Maze_solving_algorithm#Tr.C3.A9maux.27s_algorithm"""
-    # Dictionary to map each cell to its coordinates.
-    maze_dict = defaultdict(tuple)
-    # List containing coordinates to the solution of the maze.
-    maze_list = []
+    pedia.org/wiki/Maze_solving_algorithm#Tr.C3.A9maux.27s_algorithm
+    Cells are indexed directly in the Maze grid and the path is kept as
+    a stack, so each step takes constant time. Returns None if the walk
+    would repeat itself forever without finding the exit, or returns to
+    the entry point facing a direction it did not set out in. The steps
+    of the walk are counted by 'stats', a SolverStats, if given."""
+    grid = as_maze(maze)
+    data = grid.data
+    cols = grid.cols
+    size = len(data)
     # Locates the unique entry and exit point of the maze.
-    entry_point = get_entry_point(maze)
-    exit_point = get_exit_point(maze)
-    # 2-tuple of integers, starting at the entry point.
-    coordinate = entry_point
+    entry = cell_index(grid, get_entry_point(grid))
+    exit = cell_index(grid, get_exit_point(grid))
+    # Index of the current cell, starting at the entry point.
+    index = entry
     # Determines which way to traverse the maze.
-    direction = ''
+    direction = None
     # List containing directions possible to move from the entry point.
     direction_list = []
-
-    # Matches each cell in the maze to its coordinates.
-    for row_num, row in enumerate(maze):
-        for cell_num, cell in enumerate(row):
-            maze_dict[(row_num, cell_num)] = cell
+    # Stack of cell indices on the path to the current cell.
+    path = []
+    # Flags each (cell, direction) pair the walk has been in since it
+    # last left the entry point, as the walk repeats from any of them.
+    seen = bytearray(4 * size)
 
     # Appends possible directions to direction_list and determines
     # the initial direction to traverse from the entry point.
-    if entry_point:
-        if maze_dict[entry_point][R] is True:
-            direction = 'R'
-            direction_list.append('R')
-        if maze_dict[entry_point][D] is True:
-            direction = 'D'
-            direction_list.append('D')
-        if maze_dict[entry_point][L] is True:
-            direction = 'L'
-            direction_list.append('L')
-
-    # Continuously traverses the maze while under a while loop.
-    while maze_dict.keys():
-
-        # Case where current coordinate is the entry point.
-        if coordinate == entry_point:
+    for way in (R, D, L):
+        if data[entry] & (1 << way):
+            direction = way
+            direction_list.append(way)
+    if stats is not None:
+        stats.visit(divmod(entry, cols), 1)
+        if len(open_cells(grid, entry)) > 1:
+            stats.junction(divmod(entry, cols), 1)
+
+    while True:
+        # Case where current cell is the entry point.
+        if index == entry:
             # Inverts the direction corresponding to direction explored.
-            if direction not in direction_list:
-                if direction == 'U':
-                    direction = 'D'
-                elif direction == 'R':
-                    direction = 'L'
-                elif direction == 'D':
-                    direction = 'U'
-                elif direction == 'L':
-                    direction = 'R'
-
+            if direction is not None and direction not in direction_list:
+                direction = OPPOSITE[direction]
             # Returns None when back at entry point and all directions
             # have been explored.
-            if len(maze_list) > 0:
+            if len(path) > 0:
+                # Gives up if the walk returns facing an unexplored way.
+                if direction not in direction_list:
+                    return(None)
                 direction_list.remove(direction)
-                maze_list = []
+                if stats is not None:
+                    # Sets out again with only the entry point on the path.
+                    for depth in range(len(path), 0, -1):
+                        stats.backtrack(divmod(path[depth - 1], cols),
+                                        depth)
+                path = []
+                seen = bytearray(4 * size)
                 if len(direction_list) == 0:
                     return(None)
                 direction = direction_list[0]
 
         # Case where algorithm has found the exit point.
-        if coordinate == exit_point:
-            # Appends exit point into and returns the solution.
-            if len(maze_list) == 0:
-                maze_list.append(exit_point)
-            elif maze_list[-1] != exit_point:
-                maze_list.append(exit_point)
-            return(maze_list)
-
-        # Algorithm tries to traverse to the'Right'.
-        if direction is 'R':
-            # Checks if it is possible to traverse right from the cell.
-            if maze_dict[coordinate][R] is True:
-                maze_list.append(coordinate)
-                coordinate = (coordinate[0], coordinate[1] + 1)
-
-                # Checks if right adjacent cell can be traversed.
-                if coordinate in maze_dict.keys():
-                    # Once within right cell, tries to traverse in a
-                    # direction possible based on cell configuration.
-                    if (maze_dict[coordinate][U] is False or
-                       maze_dict[coordinate][D] is False):
-                        direction = 'R'
-                    if (maze_dict[coordinate][D] is False and
-                       maze_dict[coordinate][R] is False):
-                        direction = 'U'
-                    if (maze_dict[coordinate][U] is False and
-                       maze_dict[coordinate][R] is False):
-                        direction = 'D'
-
-                    # Case where dead end is found going right.
-                    if (maze_dict[coordinate][U] is False and
-                       maze_dict[coordinate][R] is False and
-                       maze_dict[coordinate][D] is False):
-                        direction = 'L'
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-                        maze_list.remove(coordinate)
-                else:
-                    direction = 'U'
-                    coordinate = (coordinate[0], coordinate[1] - 1)
-            else:
-                direction = 'D'
-
-        # Algorithm tries to traverse to the 'Left'.
-        if direction is 'L':
-            # Checks if it is possible to traverse right from the cell.
-            if maze_dict[coordinate][L] is True:
-                maze_list.append(coordinate)
-                coordinate = (coordinate[0], coordinate[1] - 1)
-                direction = 'U'
-
-                # Checks if left adjacent cell can be traversed.
-                if coordinate in maze_dict.keys():
-                    # Once within left cell, tries to traverse in a
-                    # direction possible based on cell configuration.
-                    if (maze_dict[coordinate][D] is False or
-                       maze_dict[coordinate][U] is False):
-                        direction = 'L'
-                    if (maze_dict[coordinate][D] is False and
-                       maze_dict[coordinate][L] is False):
-                        direction = 'U'
-                    if (maze_dict[coordinate][U] is False and
-                       maze_dict[coordinate][L] is False):
-                        direction = 'D'
-
-                    # Case where dead end is found going left.
-                    if (maze_dict[coordinate][D] is False and
-                       maze_dict[coordinate][L] is False and
-                       maze_dict[coordinate][U] is False):
-                        direction = 'R'
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                        maze_list.remove(coordinate)
-                else:
-                    coordinate = (coordinate[0], coordinate[1] + 1)
-                    direction = 'D'
+        if index == exit:
+            if len(path) == 0 or path[-1] != exit:
+                path.append(exit)
+            elif stats is not None:
+                # The exit point was on the path twice, having turned back
+                # into it from outside.
+                stats.backtrack(divmod(exit, cols), len(path))
+            solution = [divmod(cell, cols) for cell in path]
+            if stats is not None:
+                stats.solution(solution)
+            return(solution)
+
+        if direction is None or seen[4 * index + direction]:
+            return(None)
+        seen[4 * index + direction] = 1
+
+        # Tries each direction in turn, as moving one way may leave the
+        # algorithm facing the next.
+        for way in SOLVE_ORDER:
+            if direction != way:
+                continue
+            # Case where the cell is closed in this direction.
+            if not data[index] & (1 << way):
+                direction = SOLVE_BLOCKED[way]
+                continue
+            path.append(index)
+            following = adjacent_index(grid, index, way)
+            # Case where the opening leads out of the maze.
+            if following is None:
+                direction = SOLVE_OUTSIDE[way]
+                # The walk turns back into the cell, which is on the path
+                # once more.
+                if stats is not None:
+                    stats.visit(divmod(index, cols), len(path) + 1)
+                continue
+            # Once within the adjacent cell, tries to traverse in a
+            # direction possible based on cell configuration.
+            index = following
+            if stats is not None:
+                stats.visit(divmod(index, cols), len(path) + 1)
+                if sum(1 for cell in open_cells(grid, index)
+                       if cell != path[-1]) > 1:
+                    stats.junction(divmod(index, cols), len(path) + 1)
+            side_1, side_2 = SOLVE_SIDES[way]
+            closed_1 = not data[index] & (1 << side_1)
+            closed_2 = not data[index] & (1 << side_2)
+            closed_ahead = not data[index] & (1 << way)
+            direction = SOLVE_DEFAULT[way]
+            if closed_1 or closed_2:
+                direction = way
+            if closed_2 and closed_ahead:
+                direction = side_1
+            if closed_1 and closed_ahead:
+                direction = side_2
+            # Case where dead end is found, backtracks a step.
+            if closed_1 and closed_2 and closed_ahead:
+                direction = OPPOSITE[way]
+                if stats is not None:
+                    stats.backtrack(divmod(index, cols), len(path))
+                index = path.pop()
+
+
+def adjacent_index(grid, index, direction):
+    """Returns the index of the cell adjacent to 'index' of a Maze in the
+    given direction, or None if it lies outside the maze."""
+    cols = grid.cols
+    if direction == U:
+        return(index - cols if index >= cols else None)
+    if direction == R:
+        return(index + 1 if index % cols < cols - 1 else None)
+    if direction == D:
+        return(index + cols if index + cols < len(grid.data) else None)
+    return(index - 1 if index % cols > 0 else None)
+
+###############################################################################
+
+def shortest_paths(maze, point, stats=None):
+    """Returns a sorted list of the shortest acyclic path(s) from the
+    entry point to the exit point which pass through 'point', or None if
+    there are none. Breadth-first searches give the distance of every
+    cell to 'point' and to the exit point, and the paths are built by
+    walking the shortest path DAGs from the entry point to 'point' and
+    on to the exit point in sorted order, skipping cells already on the
+    path. If every such walk revisits a cell, the shortest acyclic paths
+    are longer than the shortest walk and shortest_paths_search is used.
+    The steps of the searches are counted by 'stats', a SolverStats, if
+    given."""
+    paths = list(iter_shortest_paths(maze, point, stats=stats))
+    return(paths if len(paths) > 0 else None)
+
+
+def bounded_shortest_paths(maze, point, max_steps=None, timeout=None,
+                           stats=None):
+    """Returns a 2-tuple of the shortest paths which pass through 'point',
+    as returned by shortest_paths, and whether the search was complete.
+    The search stops early once it has taken 'max_steps' steps, each a
+    move tried from the end of a path, or run for 'timeout' seconds, and
+    the paths found so far are returned with False. Those are shortest
+    paths unless the search had fallen back to shortest_paths_search,
+    in which case they are the shortest found before it stopped. The
+    steps of the searches are counted by 'stats', a SolverStats, if
+    given."""
+    budget = SearchBudget(max_steps, timeout)
+    paths = list(iter_shortest_paths(maze, point, budget=budget,
+                                     stats=stats))
+    return((paths if len(paths) > 0 else None, not budget.exhausted))
+
+
+class SearchBudget(object):
+    """Number of steps and seconds a search may take, counted down by
+    the search calling spend once per step, and expired while it works
+    out how far a path may still go between steps."""
+
+    def __init__(self, max_steps=None, timeout=None):
+        self.max_steps = max_steps
+        self.deadline = None if timeout is None else perf_counter() + timeout
+        self.steps = 0
+        # Set once the search has run out of steps or time.
+        self.exhausted = False
+
+    def spend(self):
+        """Counts a step and returns True if the search must stop. The
+        clock is only read every 256 steps."""
+        self.steps += 1
+        if self.max_steps is not None and self.steps > self.max_steps:
+            self.exhausted = True
+        elif (self.deadline is not None and self.steps & 255 == 0 and
+              perf_counter() >= self.deadline):
+            self.exhausted = True
+        return(self.exhausted)
+
+    def expired(self):
+        """Returns True if the search must stop, reading the clock."""
+        if (not self.exhausted and self.deadline is not None and
+           perf_counter() >= self.deadline):
+            self.exhausted = True
+        return(self.exhausted)
+
+
+class SolverStats(object):
+    """Counts the steps of a search by solve_maze or shortest_paths given
+    it as 'stats', and calls the hook given for each kind of step:
+        visit: a cell is added to the end of the path,
+        junction: a cell is added with more than one way on which the
+            search may take from it, not counting the way it came,
+        backtrack: a cell is taken off the path,
+        solution: the path reaches the exit point as a candidate.
+    The visit, junction and backtrack hooks are called with the (row,
+    column) coordinate of the cell and the number of cells on the path
+    afterwards, and the solution hook with the path. Searches check
+    whether they were given stats before each step, so that they cost
+    next to nothing without."""
+
+    def __init__(self, on_visit=None, on_junction=None, on_backtrack=None,
+                 on_solution=None):
+        self.on_visit = on_visit
+        self.on_junction = on_junction
+        self.on_backtrack = on_backtrack
+        self.on_solution = on_solution
+        self.visits = 0
+        self.junctions = 0
+        self.backtracks = 0
+        self.solutions = 0
+        # Most cells on the path at once.
+        self.peak_depth = 0
+
+    def visit(self, cell, depth):
+        self.visits += 1
+        if depth > self.peak_depth:
+            self.peak_depth = depth
+        if self.on_visit is not None:
+            self.on_visit(cell, depth)
+
+    def junction(self, cell, depth):
+        self.junctions += 1
+        if self.on_junction is not None:
+            self.on_junction(cell, depth)
+
+    def backtrack(self, cell, depth):
+        self.backtracks += 1
+        if self.on_backtrack is not None:
+            self.on_backtrack(cell, depth)
+
+    def solution(self, path):
+        self.solutions += 1
+        if self.on_solution is not None:
+            self.on_solution(path)
+
+    def counts(self):
+        """Returns the counts as a dictionary."""
+        return({'visits': self.visits, 'junctions': self.junctions,
+                'backtracks': self.backtracks, 'solutions': self.solutions,
+                'peak_depth': self.peak_depth})
+
+
+def iter_shortest_paths(maze, point, limit=None, budget=None, stats=None):
+    """Yields the shortest acyclic path(s) which pass through 'point' one
+    at a time, in the same order as shortest_paths, stopping after
+    'limit' paths if given, or once 'budget', a SearchBudget, is spent.
+    The steps of the searches are counted by 'stats', a SolverStats.
+    Each path is built only when it is requested, unless
+    shortest_paths_search is needed, which finds every path before the
+    first one is yielded."""
+    if limit is not None and limit <= 0:
+        return
+    grid = as_maze(maze)
+    found = False
+    for path in islice(iter_shortest_walks(grid, point, budget, stats),
+                       limit):
+        found = True
+        yield(path)
+    # Paths which no walk finds are left to shortest_paths_search, which
+    # is only started if the deadline has not passed.
+    if found or budget is not None and budget.expired():
+        return
+    if shortest_walk_exists(grid, point):
+        for path in islice(shortest_paths_search(maze, point, budget,
+                                                 stats) or [], limit):
+            yield(path)
+
+
+class OverlappingPaths(Exception):
+    """Raised by count_shortest_paths when the shortest paths to a point
+    and on from it to the exit point share a cell, so that the paths
+    through it can only be counted one at a time."""
+
+
+def count_shortest_paths(maze, point):
+    """Returns a 2-tuple of the number of shortest acyclic paths which
+    pass through 'point' and their length in cells, or (0, None) if there
+    are none, without building the paths. The shortest paths from the
+    entry point to 'point' and from 'point' to the exit point are counted
+    layer by layer over their breadth-first searches and multiplied,
+    which is exact when the two sets of paths share no cell but 'point'.
+    Otherwise they can only be counted one at a time, which may take
+    exponential time, so OverlappingPaths is raised instead, and
+    bounded_count_shortest_paths can count them within a budget."""
+    counted = count_shortest_walks(as_maze(maze), point)
+    if counted is None:
+        raise OverlappingPaths('shortest paths through %r overlap, so can '
+                               'only be counted one at a time' % (point,))
+    return(counted)
+
+
+def bounded_count_shortest_paths(maze, point, max_steps=None, timeout=None):
+    """Returns a 2-tuple of the number of shortest acyclic paths which
+    pass through 'point' and their length, as returned by
+    count_shortest_paths, and whether the count is exact. Where
+    count_shortest_paths raises OverlappingPaths, the paths from
+    iter_shortest_paths are counted one at a time instead, stopping once
+    the search has taken 'max_steps' steps or run for 'timeout' seconds,
+    when the paths counted so far are returned with False."""
+    grid = as_maze(maze)
+    counted = count_shortest_walks(grid, point)
+    if counted is not None:
+        return((counted, True))
+    budget = SearchBudget(max_steps, timeout)
+    count = 0
+    length = None
+    for path in iter_shortest_paths(grid, point, budget=budget):
+        count += 1
+        length = len(path)
+    return(((count, length), not budget.exhausted))
+
+
+def count_shortest_walks(grid, point):
+    """Returns a 2-tuple of the number of shortest paths of a Maze from
+    the entry point to 'point' followed by a shortest path from 'point'
+    to the exit point and their length, as count_shortest_paths, or None
+    if the two halves share a cell other than 'point', when the count
+    would include walks which revisit a cell."""
+    target = cell_index(grid, point)
+    entry = cell_index(grid, grid.entry_point)
+    exit = cell_index(grid, grid.exit_point)
+    if target is None or entry == exit:
+        return((0, None))
+    to_point, point_order = breadth_first_search(grid, target)
+    to_exit, exit_order = breadth_first_search(grid, exit)
+    if to_point[entry] < 0 or to_exit[target] < 0:
+        return((0, None))
+
+    if halves_overlap(grid, entry, target, to_point, point_order, to_exit,
+                      exit_order):
+        return(None)
+    length = to_point[entry] + to_exit[target] + 1
+    return((count_paths(grid, point_order, to_point, entry) *
+            count_paths(grid, exit_order, to_exit, target), length))
+
+
+def halves_overlap(grid, entry, target, to_point, point_order, to_exit,
+                   exit_order):
+    """Returns True if a shortest path of a Maze from the cell at index
+    'entry' to index 'target' and a shortest path from 'target' to the
+    exit point can share a cell other than 'target', given the
+    breadth-first searches to 'target' and to the exit point."""
+    # Marks the cells on shortest paths from 'entry' to 'target'.
+    first_half = bytearray(len(grid.data))
+    first_half[entry] = 1
+    for index in point_order[::-1]:
+        if first_half[index]:
+            for next_cell in next_cells(grid, index, to_point):
+                first_half[next_cell] = 1
+    # Checks whether shortest paths from 'target' to the exit point pass
+    # through any of them.
+    second_half = bytearray(len(grid.data))
+    second_half[target] = 1
+    for index in exit_order[::-1]:
+        if second_half[index]:
+            if first_half[index] and index != target:
+                return(True)
+            for next_cell in next_cells(grid, index, to_exit):
+                second_half[next_cell] = 1
+    return(False)
+
+
+def count_paths(grid, order, distance, start):
+    """Returns the number of shortest paths from the cell at index
+    'start' to the target of a breadth-first search of a Maze, given the
+    cells of the search in order and their distances."""
+    # Number of shortest paths to the target from each cell so far.
+    counts = {order[0]: 1}
+    for index in order[1:]:
+        if distance[index] > distance[start]:
+            break
+        counts[index] = sum(counts[next_cell] for next_cell
+                            in next_cells(grid, index, distance))
+    return(counts[start])
+
+
+def as_maze(maze):
+    """Returns the maze as a Maze, converting a list of rows if needed."""
+    return(maze if isinstance(maze, Maze) else Maze.from_list(maze))
+
+
+def cell_index(grid, point):
+    """Returns the index of 'point' in the cells of a Maze, or None if it
+    lies outside the maze."""
+    row_num, cell_num = point
+    if 0 <= row_num < grid.rows and 0 <= cell_num < grid.cols:
+        return(row_num * grid.cols + cell_num)
+    return(None)
+
+
+def breadth_first_search(grid, target):
+    """Returns a 2-tuple of an array of the number of moves from each
+    cell of a Maze to the cell at index 'target', with -1 for cells which
+    cannot reach it, and an array of the cells which can, in order of
+    distance. A move leaves a cell through one of its openings into the
+    adjacent cell."""
+    data = grid.data
+    cols = grid.cols
+    size = len(data)
+    distance = array('l', [-1]) * size
+    distance[target] = 0
+    # Cells are visited in the order they are queued, so the queue itself
+    # records the search order.
+    queue = array('l', [target])
+    head = 0
+    while head < len(queue):
+        index = queue[head]
+        head += 1
+        moves = distance[index] + 1
+        # Searches backwards along each opening which leads into 'index'.
+        before = index - cols
+        if before >= 0 and data[before] & 4 and distance[before] < 0:
+            distance[before] = moves
+            queue.append(before)
+        before = index + cols
+        if before < size and data[before] & 1 and distance[before] < 0:
+            distance[before] = moves
+            queue.append(before)
+        if index % cols > 0:
+            before = index - 1
+            if data[before] & 2 and distance[before] < 0:
+                distance[before] = moves
+                queue.append(before)
+        if index % cols < cols - 1:
+            before = index + 1
+            if data[before] & 8 and distance[before] < 0:
+                distance[before] = moves
+                queue.append(before)
+    return(distance, queue)
+
+
+def next_cells(grid, index, distance):
+    """Returns the indices of cells one move from 'index' which are one
+    move closer to the target of 'distance', in sorted coordinate order."""
+    mask = grid.data[index]
+    cols = grid.cols
+    closer = distance[index] - 1
+    cells = []
+    # Neighbours in the order up, left, right, down sort by coordinate.
+    if mask & 1 and index >= cols and distance[index - cols] == closer:
+        cells.append(index - cols)
+    if mask & 8 and index % cols > 0 and distance[index - 1] == closer:
+        cells.append(index - 1)
+    if (mask & 2 and index % cols < cols - 1 and
+       distance[index + 1] == closer):
+        cells.append(index + 1)
+    if (mask & 4 and index + cols < len(grid.data) and
+       distance[index + cols] == closer):
+        cells.append(index + cols)
+    return(cells)
+
+
+def shortest_walk_exists(grid, point):
+    """Returns True if 'point' can be reached from the entry point and
+    the exit point can be reached from 'point'."""
+    target = cell_index(grid, point)
+    if target is None:
+        return(False)
+    entry = cell_index(grid, grid.entry_point)
+    exit = cell_index(grid, grid.exit_point)
+    return(breadth_first_search(grid, target)[0][entry] >= 0 and
+           breadth_first_search(grid, exit)[0][target] >= 0)
+
+
+def iter_shortest_walks(grid, point, budget=None, stats=None):
+    """Yields, in sorted order, every acyclic path of a Maze made of a
+    shortest path from the entry point to 'point' followed by a shortest
+    path from 'point' to the exit point, until 'budget' is spent,
+    counting the steps of the walk with 'stats'. If the two halves can
+    share a cell, a path is only extended while remaining_route finds a
+    way to finish it, so walks bound to revisit a cell are abandoned as
+    soon as they are."""
+    target = cell_index(grid, point)
+    entry = cell_index(grid, grid.entry_point)
+    exit = cell_index(grid, grid.exit_point)
+    # Paths may not revisit the entry point, so none end on it.
+    if target is None or entry == exit:
+        return
+    to_point, point_order = breadth_first_search(grid, target)
+    to_exit, exit_order = breadth_first_search(grid, exit)
+    if to_point[entry] < 0 or to_exit[target] < 0:
+        return
+    # Number of cells on the first half, and on the whole of each path.
+    half = to_point[entry] + 1
+    length = half + to_exit[target]
+    cols = grid.cols
+
+    # Depth-first walk with a stack of untried next cells at each step.
+    path = [entry]
+    on_path = bytearray(len(grid.data))
+    on_path[entry] = 1
+    # Routes finishing each path, with the position of its last cell on
+    # the route, if the halves can share a cell.
+    routes = None
+    if halves_overlap(grid, entry, target, to_point, point_order, to_exit,
+                      exit_order):
+        route = remaining_route(grid, entry, target, exit, on_path,
+                                half == 1, length - 1, budget)
+        if route is None:
+            return
+        routes = [(route, 0)]
+    following = next_cells(grid, entry, to_point if half > 1 else to_exit)
+    if stats is not None:
+        stats.visit(divmod(entry, cols), 1)
+        if len(following) > 1:
+            stats.junction(divmod(entry, cols), 1)
+    stack = [iter(following)]
+    while stack:
+        if budget is not None and budget.spend():
+            return
+        index = next(stack[-1], None)
+        if index is None:
+            stack.pop()
+            if routes is not None:
+                routes.pop()
+            if stats is not None:
+                stats.backtrack(divmod(path[-1], cols), len(path) - 1)
+            on_path[path.pop()] = 0
+            continue
+        if on_path[index]:
+            continue
+        path.append(index)
+        if stats is not None:
+            stats.visit(divmod(index, cols), len(path))
+        if len(path) == length:
+            solution = [divmod(index, cols) for index in path]
+            if stats is not None:
+                stats.solution(solution)
+                stats.backtrack(divmod(path[-1], cols), len(path) - 1)
+            yield(solution)
+            path.pop()
+            continue
+        on_path[index] = 1
+        if routes is not None:
+            route, position = routes[-1]
+            if position + 1 < len(route) and route[position + 1] == index:
+                # The rest of the route still finishes the path.
+                position += 1
             else:
-                direction = 'U'
-
-        # Algorithm tries to traverse 'Down'.
-        if direction is 'D':
-            # Checks if it is possible to traverse downwards.
-            if maze_dict[coordinate][D] is True:
-                maze_list.append(coordinate)
-                coordinate = (coordinate[0] + 1, coordinate[1])
-
-                # Checks if cell below can be traversed.
-                if coordinate in maze_dict.keys():
-                    # Once within cell below, tries to traverse in a
-                    # direction possible based on cell configuration.
-                    if (maze_dict[coordinate][R] is False or
-                       maze_dict[coordinate][L] is False):
-                        direction = 'D'
-                    if (maze_dict[coordinate][R] is False and
-                       maze_dict[coordinate][D] is False):
-                        direction = 'L'
-                    if (maze_dict[coordinate][L] is False and
-                       maze_dict[coordinate][D] is False):
-                        direction = 'R'
-
-                    # Case where dead end is found going downwards.
-                    if (maze_dict[coordinate][R] is False and
-                       maze_dict[coordinate][D] is False and
-                       maze_dict[coordinate][L] is False):
-                        direction = 'U'
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                        maze_list.remove(coordinate)
-                else:
-                    direction = 'R'
-                    coordinate = (coordinate[0] - 1, coordinate[1])
+                route, position = remaining_route(
+                    grid, index, target, exit, on_path, len(path) >= half,
+                    length - len(path), budget), 0
+            if route is None:
+                if stats is not None:
+                    stats.backtrack(divmod(index, cols), len(path) - 1)
+                on_path[path.pop()] = 0
+                continue
+            routes.append((route, position))
+        following = next_cells(grid, index, to_point
+                               if half > len(path) else to_exit)
+        if stats is not None and sum(
+           1 for cell in following if not on_path[cell]) > 1:
+            stats.junction(divmod(index, cols), len(path))
+        stack.append(iter(following))
+
+
+def shortest_paths_search(maze, point, budget=None, stats=None):
+    """Finds the shortest acyclic path(s) which pass through 'point' by
+    backtracking: each acyclic path from the entry point is extended one
+    move at a time from an explicit stack of untried moves, and paths
+    which reach the exit point through 'point' are kept. Each path is
+    extended only along a route which can finish it as a shortest path:
+    remaining_route finds such a route once, the path is first extended
+    along it, which keeps the rest of it a shortest way to finish the
+    path, and other moves are tried only if breadth-first distances do
+    not rule them out, finding a new route for each. In a maze whose
+    openings are all matched by the adjacent cell, every path followed
+    leads to a solution. Returns the paths sorted, or None if no path
+    passes through 'point'. If 'budget', a SearchBudget, is spent first,
+    the shortest paths found so far are returned instead. The steps of
+    the search are counted by 'stats', a SolverStats, if given."""
+    grid = as_maze(maze)
+    target = cell_index(grid, point)
+    entry = cell_index(grid, grid.entry_point)
+    exit = cell_index(grid, grid.exit_point)
+    # Paths may not revisit the entry point, so none end on it.
+    if target is None or entry == exit:
+        return(None)
+    cols = grid.cols
+    on_path = bytearray(len(grid.data))
+    on_path[entry] = 1
+    first_route = remaining_route(grid, entry, target, exit, on_path,
+                                  entry == target, budget=budget)
+    if first_route is None:
+        return(None)
+    # Moves from each cell to 'point' and to the exit point, which no
+    # way of finishing a path can beat.
+    to_point = breadth_first_search(grid, target)[0]
+    to_exit = breadth_first_search(grid, exit)[0]
+    if budget is not None and budget.expired():
+        return(None)
+    # Length in cells of the shortest possible path, which is exact
+    # unless some openings are not matched by the adjacent cell.
+    best_length = len(first_route)
+    best_paths = []
+
+    while len(best_paths) == 0:
+        # Cells of the current path, flagged in 'on_path', a stack of the
+        # untried moves out of each of them, and for each a route from it
+        # to the exit point through 'point' if not yet passed, with the
+        # position of the cell on the route.
+        path = [entry]
+        # Index in 'path' at which 'point' was reached, or 0 if not yet.
+        through = 1 if entry == target else 0
+        routes = [(first_route, 0)]
+        stack = [iter(route_moves(grid, entry, first_route, 0))]
+        if stats is not None:
+            stats.visit(divmod(entry, cols), 1)
+            if len(open_cells(grid, entry)) > 1:
+                stats.junction(divmod(entry, cols), 1)
+        while stack:
+            if budget is not None and budget.spend():
+                return(sorted(best_paths) if best_paths else None)
+            index = next(stack[-1], None)
+            if index is None:
+                # Backtracks once every move out of the last cell is tried.
+                stack.pop()
+                routes.pop()
+                if stats is not None:
+                    stats.backtrack(divmod(path[-1], cols), len(path) - 1)
+                on_path[path.pop()] = 0
+                if through > len(path):
+                    through = 0
+                continue
+            if on_path[index]:
+                continue
+            if stats is not None:
+                stats.visit(divmod(index, cols), len(path) + 1)
+            if index == exit:
+                # Keeps paths which pass through 'point'.
+                if ((through or index == target) and
+                   len(path) + 1 <= best_length):
+                    if len(path) + 1 < best_length:
+                        best_length = len(path) + 1
+                        best_paths = []
+                    best_paths.append([divmod(cell, cols)
+                                       for cell in path + [index]])
+                    if stats is not None:
+                        stats.solution(best_paths[-1])
+                if stats is not None:
+                    stats.backtrack(divmod(index, cols), len(path))
+                continue
+            route, position = routes[-1]
+            path.append(index)
+            on_path[index] = 1
+            if index == target:
+                through = len(path)
+            if (position + 1 < len(route) and route[position + 1] == index):
+                # The rest of the route is still a shortest way to finish.
+                route, position = route, position + 1
             else:
-                direction = 'L'
-
-        # Algorithm tries to traverse 'Up'.
-        if direction is 'U':
-            # Checks if it is possible to traverse upwards.
-            if maze_dict[coordinate][U] is True:
-                maze_list.append(coordinate)
-                coordinate = (coordinate[0] - 1, coordinate[1])
-
-                # Checks if cell above can be traversed.
-                if coordinate in maze_dict.keys():
-                    if (maze_dict[coordinate][L] is False or
-                       maze_dict[coordinate][R] is False):
-                        direction = 'U'
-                    if (maze_dict[coordinate][L] is False and
-                       maze_dict[coordinate][U] is False):
-                        direction = 'R'
-                    if (maze_dict[coordinate][R] is False and
-                       maze_dict[coordinate][U] is False):
-                        direction = 'L'
-
-                    # Case where dead end is found going upwards.
-                    if (maze_dict[coordinate][L] is False and
-                       maze_dict[coordinate][U] is False and
-                       maze_dict[coordinate][R] is False):
-                        direction = 'D'
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                        maze_list.remove(coordinate)
-                else:
-                    direction = 'L'
-                    coordinate = (coordinate[0] + 1, coordinate[1])
+                bound = (to_exit[index] if through else
+                         -1 if to_point[index] < 0 else
+                         to_point[index] + to_exit[target])
+                route, position = None, 0
+                if 0 <= bound and len(path) + bound <= best_length:
+                    route = remaining_route(grid, index, target, exit,
+                                            on_path, through > 0,
+                                            best_length - len(path), budget)
+            if route is None or len(path) + len(route) - 1 - position > (
+                    best_length):
+                if stats is not None:
+                    stats.backtrack(divmod(index, cols), len(path) - 1)
+                on_path[path.pop()] = 0
+                if through > len(path):
+                    through = 0
+                continue
+            following = route_moves(grid, index, route, position)
+            if stats is not None and sum(
+               1 for cell in following if not on_path[cell]) > 1:
+                stats.junction(divmod(index, cols), len(path))
+            routes.append((route, position))
+            stack.append(iter(following))
+
+        # Openings not matched by the adjacent cell can make the shortest
+        # possible length unreachable, so the search is repeated without it.
+        if len(best_paths) == 0:
+            if best_length > len(grid.data):
+                return(None)
+            if budget is not None and budget.exhausted:
+                return(None)
+            best_length = len(grid.data) + 1
+            on_path[entry] = 1
+
+    return(sorted(best_paths))
+
+
+def route_moves(grid, index, route, position):
+    """Returns the indices of the cells adjacent to 'index' in a Maze
+    which it is open to, starting with the next cell of 'route' after
+    'index', which is at 'position' on the route, if it is one of them."""
+    cells = open_cells(grid, index)
+    if position + 1 < len(route) and route[position + 1] in cells:
+        cells.remove(route[position + 1])
+        cells.insert(0, route[position + 1])
+    return(cells)
+
+
+def remaining_route(grid, start, target, exit, on_path, through,
+                    limit=None, budget=None):
+    """Returns a shortest route of a Maze as a list of cell indices from
+    index 'start' to the exit which enters no cell flagged in 'on_path',
+    passing through 'target' unless 'through' is True, or None if there
+    is none, it would take more than 'limit' moves or 'budget' expires
+    first. Until 'target' is
+    passed, the shortest paths to 'target' and on to the exit make the
+    route unless they cross, when it is found as a pair of paths out of
+    'target' by disjoint_paths instead, which treats openings as leading
+    both ways, so it may not be possible to follow if some openings are
+    not matched."""
+    if through or target == start:
+        route = path_avoiding(grid, start, exit, on_path, budget)
+    else:
+        first = path_avoiding(grid, start, target, on_path, budget)
+        second = first and path_avoiding(grid, target, exit, on_path,
+                                         budget)
+        if not second:
+            return(None)
+        # Any route is at least as long as the two paths, which give it
+        # if they do not cross.
+        if limit is not None and len(first) + len(second) - 2 > limit:
+            return(None)
+        if set(first).isdisjoint(second[1:]):
+            return(first + second[1:])
+        paths = disjoint_paths(grid, start, target, exit, on_path, budget)
+        route = paths and paths[0][::-1] + paths[1][1:]
+    if route is None or (limit is not None and len(route) - 1 > limit):
+        return(None)
+    return(route)
+
+
+def path_avoiding(grid, start, goal, on_path, budget=None):
+    """Returns a shortest path of a Maze as a list of cell indices from
+    index 'start' to index 'goal' which enters no cell flagged in
+    'on_path', or None if 'goal' cannot be reached or 'budget', a
+    SearchBudget, expires first."""
+    if start == goal:
+        return([start])
+    previous = {start: None}
+    queue = [start]
+    for count, index in enumerate(queue, 1):
+        if budget is not None and count & 1023 == 0 and budget.expired():
+            return(None)
+        for next_cell in open_cells(grid, index):
+            if not on_path[next_cell] and next_cell not in previous:
+                previous[next_cell] = index
+                if next_cell == goal:
+                    path = [goal]
+                    while previous[path[-1]] is not None:
+                        path.append(previous[path[-1]])
+                    return(path[::-1])
+                queue.append(next_cell)
+    return(None)
+
+
+def disjoint_paths(grid, start, target, exit, on_path, budget=None):
+    """Returns a pair of paths of a Maze as lists of cell indices, one
+    from index 'target' to 'start' and one from 'target' to 'exit', which
+    share no cell but 'target', enter no cell flagged in 'on_path' except
+    'start', and have the fewest moves between them, or None if there is
+    no such pair or 'budget', a SearchBudget, expires first. Openings
+    are treated as leading both ways, so the pair never has more moves
+    than needed to go from 'start' through 'target' to 'exit'. The pair
+    is found as a minimum cost flow of two units out of 'target', in
+    which each cell is split into an entering and a leaving node joined
+    by an arc of capacity one."""
+    data = grid.data
+    cols = grid.cols
+    size = len(data)
+    sink = 2 * size
+    # Residual arcs as parallel lists, where arc ^ 1 reverses arc.
+    heads = []
+    capacities = []
+    costs = []
+    arcs = [[] for node in range(sink + 1)]
+
+    def add_arc(tail, head, capacity, cost):
+        arcs[tail].append(len(heads))
+        heads.append(head)
+        capacities.append(capacity)
+        costs.append(cost)
+        arcs[head].append(len(heads))
+        heads.append(tail)
+        capacities.append(0)
+        costs.append(-cost)
+
+    for index in range(size):
+        if (budget is not None and index & 1023 == 0 and
+           budget.expired()):
+            return(None)
+        if on_path[index] and index != start:
+            continue
+        add_arc(2 * index, 2 * index + 1, 2 if index == target else 1, 0)
+        # Joins the cell to the cells to its right and below.
+        right = index + 1
+        if (index % cols < cols - 1 and
+           (not on_path[right] or right == start) and
+           (data[index] & 2 or data[right] & 8)):
+            add_arc(2 * index + 1, 2 * right, 1, 1)
+            add_arc(2 * right + 1, 2 * index, 1, 1)
+        below = index + cols
+        if (below < size and (not on_path[below] or below == start) and
+           (data[index] & 4 or data[below] & 1)):
+            add_arc(2 * index + 1, 2 * below, 1, 1)
+            add_arc(2 * below + 1, 2 * index, 1, 1)
+    add_arc(2 * start + 1, sink, 1, 0)
+    add_arc(2 * exit + 1, sink, 1, 0)
+
+    # Sends each unit along the cheapest residual route to the sink, found
+    # by Dijkstra's algorithm with arc costs reduced by node potentials,
+    # which keep them from being negative.
+    potentials = [0] * (sink + 1)
+    for unit in range(2):
+        distance = [None] * (sink + 1)
+        distance[2 * target] = 0
+        arc_in = [None] * (sink + 1)
+        done = bytearray(sink + 1)
+        heap = [(0, 2 * target)]
+        popped = 0
+        while heap:
+            popped += 1
+            if (budget is not None and popped & 1023 == 0 and
+               budget.expired()):
+                return(None)
+            reduced, node = heappop(heap)
+            if done[node]:
+                continue
+            done[node] = 1
+            if node == sink:
+                break
+            for arc in arcs[node]:
+                head = heads[arc]
+                if capacities[arc] > 0 and not done[head]:
+                    cost = (reduced + costs[arc] + potentials[node] -
+                            potentials[head])
+                    if distance[head] is None or cost < distance[head]:
+                        distance[head] = cost
+                        arc_in[head] = arc
+                        heappush(heap, (cost, head))
+        if not done[sink]:
+            return(None)
+        # Distances beyond the sink's are not final, so are capped at it.
+        for node in range(sink + 1):
+            if distance[node] is None or distance[node] > distance[sink]:
+                potentials[node] += distance[sink]
             else:
-                direction = 'R'
+                potentials[node] += distance[node]
+        node = sink
+        while node != 2 * target:
+            arc = arc_in[node]
+            capacities[arc] -= 1
+            capacities[arc ^ 1] += 1
+            node = heads[arc ^ 1]
+
+    # Follows the two units out of 'target' along the arcs carrying them,
+    # whose reversed arcs have spare capacity, taking each arc once.
+    paths = []
+    for unit in range(2):
+        path = [target]
+        node = 2 * target + 1
+        while node != sink:
+            for arc in arcs[node]:
+                if arc % 2 == 0 and capacities[arc ^ 1] > 0:
+                    capacities[arc ^ 1] -= 1
+                    node = heads[arc]
+                    break
+            if node != sink:
+                path.append(node // 2)
+                node += 1
+        paths.append(path)
+    if paths[0][-1] != start:
+        paths.reverse()
+    return(tuple(paths))
+
+
+def open_cells(grid, index):
+    """Returns the indices of the cells adjacent to 'index' in a Maze
+    which it is open to, in sorted coordinate order."""
+    mask = grid.data[index]
+    cols = grid.cols
+    cells = []
+    if mask & 1 and index >= cols:
+        cells.append(index - cols)
+    if mask & 8 and index % cols > 0:
+        cells.append(index - 1)
+    if mask & 2 and index % cols < cols - 1:
+        cells.append(index + 1)
+    if mask & 4 and index + cols < len(grid.data):
+        cells.append(index + cols)
+    return(cells)
 
 ###############################################################################
 
-def shortest_paths(maze, point):
-    """Finds the shortest acyclic path(s) which passes through 'point'
-    using an algorithm which uses a 'brute-force' method to determine
-    every possible combination of moves from the starting point. The
-    iterative part of the algorithm uses the cell configuration to
-    determine which direction to traverse, and appends multiple
-    'direction-coordinate lists' in the instance a cell has more than
-    one direction possible to be traversed. The recursive part of the
-    algorithm triggers when it repeatedly calls a separate function
-    'remove_paths' when encountered with one instance of the exit point
-    or a dead end. Said function will cause the algorithm to backtrack
-    to the last junction traversed to move in another direction.
-    Algorithm is possibly similar to the Recursive Algorithm: http://en.
-    wikipedia.org/wiki/Maze_solving_algorithm#Recursive_algorithm
-    NOTE: I am sincerely sorry for the length of this code..."""
-    # Locates the unique entry and exit point of the maze.
-    entry_point = get_entry_point(maze)
-    exit_point = get_exit_point(maze)
-    # Dictionary to map each cell to its coordinates.
-    maze_dict = maze_dictionary(maze)
-    # Dictionary of all possible cell configurations.
-    path_dict = defaultdict(tuple)
-    path_dict = path_dictionary(path_dict)
-    # 2-tuple of integers, starting at the entry point.
-    coordinate = entry_point
-    # Determines which way to traverse the maze.
-    direction = ''
-    # List containing directions possible to move from the entry point.
-    direction_list = []
-    # List of coordinates being traversed.
-    path_list = []
-    # List containing coordinates of cells visited.
-    visit_list = []
-    # List containing coordinates of each the solution of the maze.
-    route_list = []
-    # List of all possible solutions of the maze.
-    maze_list = []
-    # List of acyclic paths which go through point.
-    through_list = []
-    # List of shortest acyclic paths which go through point.
-    shortest_list = []
+class TraceClosed(Exception):
+    """Raised within a traced search once its trace is closed."""
+
+
+def iter_trace(search, maze, *args, packed=False, chunk_size=4096,
+               **kwargs):
+    """Yields the events of a search, such as solve_maze or shortest_paths,
+    called with the maze and any other arguments given, as it runs. Each
+    event is a 4-tuple of its kind (TRACE_VISIT, TRACE_JUNCTION,
+    TRACE_BACKTRACK or TRACE_SOLUTION), the row and column of the cell
+    and the number of cells on the path, as passed to the hooks of
+    SolverStats. If 'packed' is True, the events are instead yielded in
+    chunks of 'chunk_size' events, each an array of 32-bit integers
+    holding four per event.
+    The search runs in a thread which waits while a few chunks are
+    unread, so that only those are held in memory, and is stopped when
+    the trace is closed."""
+    chunks = Queue(maxsize=4)
+    closed = Event()
+    # Events of the chunk being filled, in a list so hooks can replace it.
+    chunk = [array('i')]
+
+    def record(kind, cell, depth):
+        chunk[0].extend((kind, cell[0], cell[1], depth))
+        if len(chunk[0]) >= 4 * chunk_size:
+            if closed.is_set():
+                raise TraceClosed()
+            chunks.put(chunk[0])
+            chunk[0] = array('i')
+
+    stats = SolverStats(
+        lambda cell, depth: record(TRACE_VISIT, cell, depth),
+        lambda cell, depth: record(TRACE_JUNCTION, cell, depth),
+        lambda cell, depth: record(TRACE_BACKTRACK, cell, depth),
+        lambda path: record(TRACE_SOLUTION, path[-1], len(path)))
+
+    def run():
+        try:
+            search(maze, *args, stats=stats, **kwargs)
+            chunks.put(chunk[0])
+        except TraceClosed:
+            return
+        except Exception as error:
+            chunks.put(error)
+        chunks.put(None)
+
+    thread = Thread(target=run)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            events = chunks.get()
+            if events is None:
+                break
+            if isinstance(events, Exception):
+                raise events
+            if packed:
+                yield(events)
+                continue
+            for start in range(0, len(events), 4):
+                yield(tuple(events[start:start + 4]))
+    finally:
+        # Unblocks the search so that it sees the trace is closed.
+        closed.set()
+        while thread.is_alive():
+            try:
+                chunks.get(timeout=0.01)
+            except Empty:
+                pass
+
+
+def write_trace(events, path):
+    """Writes a trace, an iterable of events or of packed chunks of them
+    as yielded by iter_trace, to the file at 'path' in the binary trace
+    format, and returns the number of events written."""
+    count = 0
+    pending = array('i')
+    with open(path, 'wb') as trace_file:
+        trace_file.write(TRACE_FILE_HEADER.pack(
+            TRACE_FILE_MAGIC, TRACE_FILE_VERSION, 4))
+        for event in chain(events, [None]):
+            # Events are written in chunks of at least 4096.
+            if event is not None:
+                pending.extend(event)
+                if len(pending) < 4 * 4096:
+                    continue
+            if sys.byteorder == 'big':
+                pending.byteswap()
+            pending.tofile(trace_file)
+            count += len(pending) // 4
+            pending = array('i')
+    return(count)
+
+
+def read_trace(path, packed=False, chunk_size=4096):
+    """Yields the events of the trace in the binary trace file at 'path'
+    one at a time, as iter_trace yields them, reading 'chunk_size'
+    events at a time. Raises ValueError if the file is not a trace."""
+    with open(path, 'rb') as trace_file:
+        header = trace_file.read(TRACE_FILE_HEADER.size)
+        if (len(header) < TRACE_FILE_HEADER.size or
+           TRACE_FILE_HEADER.unpack(header)[0] != TRACE_FILE_MAGIC):
+            raise ValueError('%s is not a trace file' % path)
+        magic, version, width = TRACE_FILE_HEADER.unpack(header)
+        if version != TRACE_FILE_VERSION:
+            raise ValueError('%s has unsupported trace file version %d'
+                             % (path, version))
+        if width != 4:
+            raise ValueError('%s has %d integers in each event, expected 4'
+                             % (path, width))
+        while True:
+            events = array('i')
+            try:
+                events.fromfile(trace_file, 4 * chunk_size)
+            except EOFError:
+                pass
+            if len(events) == 0:
+                return
+            if sys.byteorder == 'big':
+                events.byteswap()
+            if packed:
+                yield(events)
+                continue
+            for start in range(0, len(events) - 3, 4):
+                yield(tuple(events[start:start + 4]))
 
-    # Appends possible directions to direction_list and determines
-    # the initial direction to traverse from the entry point.
-    if entry_point:
-        if maze_dict[entry_point][R] is True:
-            direction = 'R'
-            direction_list.append('R')
-        if maze_dict[entry_point][D] is True:
-            direction = 'D'
-            direction_list.append('D')
-        if maze_dict[entry_point][L] is True:
-            direction = 'L'
-            direction_list.append('L')
-
-    # Appends list of direction and coordinates possible to be
-    # traversed from the entry point.
-    for direction in direction_list:
-        path_list.append([direction, entry_point])
-        visit_list.append([direction, entry_point])
-
-    # Continuously traverses the maze while under a while loop.
-    while coordinate in maze_dict.keys():
-        # Algorithm traverses 'Up'.
-        if direction is 'U':
-            # Case where current coordinate is the entry point.
-            if coordinate == entry_point:
-                # Asserts whether coordinate has been traversed.
-                if coordinate in visit_list:
-                    # Backtracks to the last junction encountered.
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-                else:
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    coordinate = (coordinate[0] - 1, coordinate[1])
-
-            # Case where algorithm has found the exit point.
-            elif coordinate == exit_point:
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-                route_list = []
-
-                # Captures coordinates as one instance of a solution.
-                for coordinate in path_list:
-                    if type(coordinate) is tuple:
-                        route_list.append(coordinate)
-                maze_list.append(route_list)
-                # Backtracks to the last junction encountered.
-                (path_list, visit_list
-                 ) = remove_paths(path_list, visit_list)
-                if len(path_list) == 0:
-                    break
-                while (len(path_list) > 0 and
-                       type(path_list[-1]) is tuple):
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                # Breaks if no directions left to traverse
-                if len(path_list) == 0:
-                    break
-                coordinate = path_list[-1][1]
-                direction = path_list[-1][0]
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-                if direction is 'U':
-                    coordinate = (coordinate[0] - 1, coordinate[1])
-                elif direction is 'R':
-                    coordinate = (coordinate[0], coordinate[1] + 1)
-                elif direction is 'D':
-                    coordinate = (coordinate[0] + 1, coordinate[1])
-                elif direction is 'L':
-                    coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where dead end is encountered going up.
-            elif path_dict[maze_dict[coordinate]] == 0:
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-
-                # Backtracks to the last junction encountered.
-                (path_list, visit_list
-                 ) = remove_paths(path_list, visit_list)
-                if len(path_list) == 0:
-                    break
-                while (len(path_list) > 0 and
-                       type(path_list[-1]) is tuple):
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                # Breaks if no directions left to traverse
-                if len(path_list) == 0:
-                    break
-                coordinate = path_list[-1][1]
-                direction = path_list[-1][0]
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-                if direction is 'U':
-                    coordinate = (coordinate[0] - 1, coordinate[1])
-                elif direction is 'R':
-                    coordinate = (coordinate[0], coordinate[1] + 1)
-                elif direction is 'D':
-                    coordinate = (coordinate[0] + 1, coordinate[1])
-                elif direction is 'L':
-                    coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where cell has only one direction to be traversed.
-            elif path_dict[maze_dict[coordinate]] == 1:
-                # Asserts cell has not been visited.
-                if coordinate not in visit_list:
-                    if maze_dict[coordinate
-                                 ] == (False, True, True, False):
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                        direction = 'R'
-                    elif maze_dict[coordinate
-                                   ] == (False, False, True, True):
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-                        direction = 'L'
-                    elif maze_dict[coordinate
-                                   ] == (True, False, True, False):
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                        direction = 'U'
-
-                # Backtracks to the last junction encountered.
-                else:
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where cell has two directions possible to traverse.
-            elif path_dict[maze_dict[coordinate]] == 2:
-                # Asserts cell has not been visited.
-                if coordinate not in visit_list:
-                    if maze_dict[coordinate
-                                 ] == (True, False, True, True):
-                        visit_list.append(coordinate)
-                        if ['U', coordinate] not in visit_list:
-                            path_list.append(['U', coordinate])
-                            visit_list.append(['U', coordinate])
-                        if ['L', coordinate] not in visit_list:
-                            path_list.append(['L', coordinate])
-                            visit_list.append(['L', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['U', coordinate]:
-                            coordinate = (coordinate[0] - 1,
-                                          coordinate[1])
-                            direction = 'U'
-                        elif path_list[-2] == ['L', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] - 1)
-                            direction = 'L'
-                    elif maze_dict[coordinate
-                                   ] == (True, True, True, False):
-                        visit_list.append(coordinate)
-                        if ['U', coordinate] not in visit_list:
-                            path_list.append(['U', coordinate])
-                            visit_list.append(['U', coordinate])
-                        if ['R', coordinate] not in visit_list:
-                            path_list.append(['R', coordinate])
-                            visit_list.append(['R', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['U', coordinate]:
-                            coordinate = (coordinate[0] - 1,
-                                          coordinate[1])
-                            direction = 'U'
-                        if path_list[-2] == ['R', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] + 1)
-                            direction = 'R'
-                    elif maze_dict[coordinate
-                                   ] == (False, True, True, True):
-                        visit_list.append(coordinate)
-                        if ['R', coordinate] not in visit_list:
-                            path_list.append(['R', coordinate])
-                            visit_list.append(['R', coordinate])
-                        if ['L', coordinate] not in visit_list:
-                            path_list.append(['L', coordinate])
-                            visit_list.append(['L', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['R', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] + 1)
-                            direction = 'R'
-                        if path_list[-2] == ['L', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] - 1)
-                            direction = 'L'
-
-                # Backtracks to the last junction encountered.
-                else:
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where cell has three possible directions to traverse.
-            elif path_dict[maze_dict[coordinate]] == 3:
-                # Asserts cell has not been visited.
-                if coordinate not in visit_list:
-                    if maze_dict[coordinate
-                                 ] == (True, True, True, True):
-                        visit_list.append(coordinate)
-                        if ['U', coordinate] not in visit_list:
-                            path_list.append(['U', coordinate])
-                            visit_list.append(['U', coordinate])
-                        if ['R', coordinate] not in visit_list:
-                            path_list.append(['R', coordinate])
-                            visit_list.append(['R', coordinate])
-                        if ['L', coordinate] not in visit_list:
-                            path_list.append(['L', coordinate])
-                            visit_list.append(['L', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['U', coordinate]:
-                            coordinate = (coordinate[0] - 1,
-                                          coordinate[1])
-                            direction = 'U'
-                        if path_list[-2] == ['R', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] + 1)
-                            direction = 'R'
-                        if path_list[-2] == ['L', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] - 1)
-                            direction = 'L'
-
-                # Backtracks to the last junction encountered.
-                else:
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-
-        # Algorithm traverses to the 'Right'.
-        elif direction is 'R':
-            # Case where current coordinate is the entry point.
-            if coordinate == entry_point:
-                # Asserts whether coordinate has been traversed.
-                if coordinate in visit_list:
-                    # Backtracks to the last junction encountered.
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-                else:
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    coordinate = (coordinate[0], coordinate[1] + 1)
-
-            # Case where algorithm has found the exit point.
-            elif coordinate == exit_point:
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-                route_list = []
-
-                # Captures coordinates as one instance of a solution.
-                for coordinate in path_list:
-                    if type(coordinate) is tuple:
-                        route_list.append(coordinate)
-                maze_list.append(route_list)
-
-                # Backtracks to the last junction encountered.
-                (path_list, visit_list
-                 ) = remove_paths(path_list, visit_list)
-                if len(path_list) == 0:
-                    break
-                while (len(path_list) > 0 and
-                       type(path_list[-1]) is tuple):
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                # Breaks if no directions left to traverse
-                if len(path_list) == 0:
-                    break
-                coordinate = path_list[-1][1]
-                direction = path_list[-1][0]
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-                if direction is 'U':
-                    coordinate = (coordinate[0] - 1, coordinate[1])
-                elif direction is 'R':
-                    coordinate = (coordinate[0], coordinate[1] + 1)
-                elif direction is 'D':
-                    coordinate = (coordinate[0] + 1, coordinate[1])
-                elif direction is 'L':
-                    coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where dead end is encountered going right.
-            elif path_dict[maze_dict[coordinate]] == 0:
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-
-                # Backtracks to the last junction encountered.
-                (path_list, visit_list
-                 ) = remove_paths(path_list, visit_list)
-                if len(path_list) == 0:
-                    break
-                while (len(path_list) > 0 and
-                       type(path_list[-1]) is tuple):
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                # Breaks if no directions left to traverse
-                if len(path_list) == 0:
-                    break
-                coordinate = path_list[-1][1]
-                direction = path_list[-1][0]
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-                if direction is 'U':
-                    coordinate = (coordinate[0] - 1, coordinate[1])
-                elif direction is 'R':
-                    coordinate = (coordinate[0], coordinate[1] + 1)
-                elif direction is 'D':
-                    coordinate = (coordinate[0] + 1, coordinate[1])
-                elif direction is 'L':
-                    coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where cell has only one direction to be traversed.
-            elif path_dict[maze_dict[coordinate]] == 1:
-                # Asserts cell has not been visited.
-                if coordinate not in visit_list:
-                    if maze_dict[coordinate
-                                 ] == (False, False, True, True):
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                        direction = 'D'
-                    elif maze_dict[coordinate
-                                   ] == (True, False, False, True):
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                        direction = 'U'
-                    elif maze_dict[coordinate
-                                   ] == (False, True, False, True):
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                        direction = 'R'
-
-                # Backtracks to the last junction encountered.
-                else:
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where cell has two directions possible to traverse.
-            elif path_dict[maze_dict[coordinate]] == 2:
-                # Asserts cell has not been visited.
-                if coordinate not in visit_list:
-                    if maze_dict[coordinate
-                                 ] == (False, True, True, True):
-                        visit_list.append(coordinate)
-                        if ['R', coordinate] not in visit_list:
-                            path_list.append(['R', coordinate])
-                            visit_list.append(['R', coordinate])
-                        if ['D', coordinate] not in visit_list:
-                            path_list.append(['D', coordinate])
-                            visit_list.append(['D', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['R', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] + 1)
-                            direction = 'R'
-                        elif path_list[-2] == ['D', coordinate]:
-                            coordinate = (coordinate[0] + 1,
-                                          coordinate[1])
-                            direction = 'D'
-                    elif maze_dict[coordinate
-                                   ] == (True, True, False, True):
-                        visit_list.append(coordinate)
-                        if ['U', coordinate] not in visit_list:
-                            path_list.append(['U', coordinate])
-                            visit_list.append(['U', coordinate])
-                        if ['R', coordinate] not in visit_list:
-                            path_list.append(['R', coordinate])
-                            visit_list.append(['R', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['U', coordinate]:
-                            coordinate = (coordinate[0] - 1,
-                                          coordinate[1])
-                            direction = 'U'
-                        if path_list[-2] == ['R', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] + 1)
-                            direction = 'R'
-                    elif maze_dict[coordinate
-                                   ] == (True, False, True, True):
-                        visit_list.append(coordinate)
-                        if ['U', coordinate] not in visit_list:
-                            path_list.append(['U', coordinate])
-                            visit_list.append(['U', coordinate])
-                        if ['D', coordinate] not in visit_list:
-                            path_list.append(['D', coordinate])
-                            visit_list.append(['D', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['U', coordinate]:
-                            coordinate = (coordinate[0] - 1,
-                                          coordinate[1])
-                            direction = 'U'
-                        if path_list[-2] == ['D', coordinate]:
-                            coordinate = (coordinate[0] + 1,
-                                          coordinate[1])
-                            direction = 'D'
-
-                # Backtracks to the last junction encountered.
-                else:
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where cell has three possible directions to traverse.
-            elif path_dict[maze_dict[coordinate]] == 3:
-                # Asserts cell has not been visited.
-                if coordinate not in visit_list:
-                    if maze_dict[coordinate
-                                 ] == (True, True, True, True):
-                        visit_list.append(coordinate)
-                        if ['U', coordinate] not in visit_list:
-                            path_list.append(['U', coordinate])
-                            visit_list.append(['U', coordinate])
-                        if ['R', coordinate] not in visit_list:
-                            path_list.append(['R', coordinate])
-                            visit_list.append(['R', coordinate])
-                        if ['D', coordinate] not in visit_list:
-                            path_list.append(['D', coordinate])
-                            visit_list.append(['D', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['U', coordinate]:
-                            coordinate = (coordinate[0] - 1,
-                                          coordinate[1])
-                            direction = 'U'
-                        if path_list[-2] == ['R', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] + 1)
-                            direction = 'R'
-                        if path_list[-2] == ['D', coordinate]:
-                            coordinate = (coordinate[0] + 1,
-                                          coordinate[1])
-                            direction = 'D'
-
-                # Backtracks to the last junction encountered.
-                else:
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-
-        # Algorithm tries traversing 'Down'.
-        elif direction is 'D':
-            # Case where current coordinate is the entry point.
-            if coordinate == entry_point:
-                # Asserts whether coordinate has been traversed.
-                if coordinate in visit_list:
-                    # Backtracks to the last junction encountered.
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-                else:
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    coordinate = (coordinate[0] + 1, coordinate[1])
-
-            # Case where algorithm has found the exit point.
-            elif coordinate == exit_point:
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-                route_list = []
-
-                # Captures coordinates as one instance of a solution.
-                for coordinate in path_list:
-                    if type(coordinate) is tuple:
-                        route_list.append(coordinate)
-                maze_list.append(route_list)
-
-                # Backtracks to the last junction encountered.
-                (path_list, visit_list
-                 ) = remove_paths(path_list, visit_list)
-                if len(path_list) == 0:
-                    break
-                while (len(path_list) > 0 and
-                       type(path_list[-1]) is tuple):
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                # Breaks if no directions left to traverse
-                if len(path_list) == 0:
-                    break
-                coordinate = path_list[-1][1]
-                direction = path_list[-1][0]
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-                if direction is 'U':
-                    coordinate = (coordinate[0] - 1, coordinate[1])
-                elif direction is 'R':
-                    coordinate = (coordinate[0], coordinate[1] + 1)
-                elif direction is 'D':
-                    coordinate = (coordinate[0] + 1, coordinate[1])
-                elif direction is 'L':
-                    coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where dead end is encountered going down.
-            elif path_dict[maze_dict[coordinate]] == 0:
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-
-                # Backtracks to the last junction encountered.
-                (path_list, visit_list
-                 ) = remove_paths(path_list, visit_list)
-                if len(path_list) == 0:
-                    break
-                while (len(path_list) > 0 and
-                       type(path_list[-1]) is tuple):
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                # Breaks if no directions left to traverse
-                if len(path_list) == 0:
-                    break
-                coordinate = path_list[-1][1]
-                direction = path_list[-1][0]
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-                if direction is 'U':
-                    coordinate = (coordinate[0] - 1, coordinate[1])
-                elif direction is 'R':
-                    coordinate = (coordinate[0], coordinate[1] + 1)
-                elif direction is 'D':
-                    coordinate = (coordinate[0] + 1, coordinate[1])
-                elif direction is 'L':
-                    coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where cell has only one direction to be traversed.
-            elif path_dict[maze_dict[coordinate]] == 1:
-                # Asserts cell has not been visited.
-                if coordinate not in visit_list:
-                    if maze_dict[coordinate
-                                 ] == (True, True, False, False):
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                        direction = 'R'
-                    elif maze_dict[coordinate
-                                   ] == (True, False, False, True):
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-                        direction = 'L'
-                    elif maze_dict[coordinate
-                                   ] == (True, False, True, False):
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                        direction = 'D'
-
-                # Backtracks to the last junction encountered.
-                else:
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where cell has two directions possible to traverse.
-            elif path_dict[maze_dict[coordinate]] == 2:
-                # Asserts cell has not been visited.
-                if coordinate not in visit_list:
-                    if maze_dict[coordinate
-                                 ] == (True, False, True, True):
-                        visit_list.append(coordinate)
-                        if ['D', coordinate] not in visit_list:
-                            path_list.append(['D', coordinate])
-                            visit_list.append(['D', coordinate])
-                        if ['L', coordinate] not in visit_list:
-                            path_list.append(['L', coordinate])
-                            visit_list.append(['L', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['D', coordinate]:
-                            coordinate = (coordinate[0] + 1,
-                                          coordinate[1])
-                            direction = 'D'
-                        elif path_list[-2] == ['L', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] - 1)
-                            direction = 'L'
-                    elif maze_dict[coordinate
-                                   ] == (True, True, True, False):
-                        visit_list.append(coordinate)
-                        if ['R', coordinate] not in visit_list:
-                            path_list.append(['R', coordinate])
-                            visit_list.append(['R', coordinate])
-                        if ['D', coordinate] not in visit_list:
-                            path_list.append(['D', coordinate])
-                            visit_list.append(['D', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['R', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] + 1)
-                            direction = 'R'
-                        if path_list[-2] == ['D', coordinate]:
-                            coordinate = (coordinate[0] + 1,
-                                          coordinate[1])
-                            direction = 'D'
-                    elif maze_dict[coordinate
-                                   ] == (True, True, False, True):
-                        visit_list.append(coordinate)
-                        if ['D', coordinate] not in visit_list:
-                            path_list.append(['R', coordinate])
-                            visit_list.append(['R', coordinate])
-                        if ['L', coordinate] not in visit_list:
-                            path_list.append(['L', coordinate])
-                            visit_list.append(['L', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['R', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] + 1)
-                            direction = 'R'
-                        if path_list[-2] == ['L', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] - 1)
-                            direction = 'L'
-
-                # Backtracks to the last junction encountered.
-                else:
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where cell has three possible directions to traverse.
-            elif path_dict[maze_dict[coordinate]] == 3:
-                # Asserts cell has not been visited.
-                if coordinate not in visit_list:
-                    if maze_dict[coordinate
-                                 ] == (True, True, True, True):
-                        visit_list.append(coordinate)
-                        if ['R', coordinate] not in visit_list:
-                            path_list.append(['R', coordinate])
-                            visit_list.append(['R', coordinate])
-                        if ['D', coordinate] not in visit_list:
-                            path_list.append(['D', coordinate])
-                            visit_list.append(['D', coordinate])
-                        if ['L', coordinate] not in visit_list:
-                            path_list.append(['L', coordinate])
-                            visit_list.append(['L', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['R', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] + 1)
-                            direction = 'R'
-                        if path_list[-2] == ['D', coordinate]:
-                            coordinate = (coordinate[0] + 1,
-                                          coordinate[1])
-                            direction = 'D'
-                        if path_list[-2] == ['L', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] - 1)
-                            direction = 'L'
-
-                # Backtracks to the last junction encountered.
-                else:
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-
-        # Algorithm tries traversing to the 'Left'.
-        elif direction is 'L':
-            # Case where current coordinate is the entry point.
-            if coordinate == entry_point:
-                # Asserts whether coordinate has been traversed.
-                if coordinate in visit_list:
-                    # Backtracks to the last junction encountered.
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-                else:
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where algorithm has found the exit point.
-            elif coordinate == exit_point:
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-                route_list = []
-
-                # Captures coordinates as one instance of a solution.
-                for coordinate in path_list:
-                    if type(coordinate) is tuple:
-                        route_list.append(coordinate)
-                maze_list.append(route_list)
-
-                # Backtracks to the last junction encountered.
-                (path_list, visit_list
-                 ) = remove_paths(path_list, visit_list)
-                if len(path_list) == 0:
-                    break
-                while (len(path_list) > 0 and
-                       type(path_list[-1]) is tuple):
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                # Breaks if no directions left to traverse
-                if len(path_list) == 0:
-                    break
-                coordinate = path_list[-1][1]
-                direction = path_list[-1][0]
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-                if direction is 'U':
-                    coordinate = (coordinate[0] - 1, coordinate[1])
-                elif direction is 'R':
-                    coordinate = (coordinate[0], coordinate[1] + 1)
-                elif direction is 'D':
-                    coordinate = (coordinate[0] + 1, coordinate[1])
-                elif direction is 'L':
-                    coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where dead end is encountered going up.
-            elif path_dict[maze_dict[coordinate]] == 0:
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-
-                # Backtracks to the last junction encountered.
-                (path_list, visit_list
-                 ) = remove_paths(path_list, visit_list)
-                if len(path_list) == 0:
-                    break
-                while (len(path_list) > 0 and
-                       type(path_list[-1]) is tuple):
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                # Breaks if no directions left to traverse
-                if len(path_list) == 0:
-                    break
-                coordinate = path_list[-1][1]
-                direction = path_list[-1][0]
-                path_list.append(coordinate)
-                visit_list.append(coordinate)
-                if direction is 'U':
-                    coordinate = (coordinate[0] - 1, coordinate[1])
-                elif direction is 'R':
-                    coordinate = (coordinate[0], coordinate[1] + 1)
-                elif direction is 'D':
-                    coordinate = (coordinate[0] + 1, coordinate[1])
-                elif direction is 'L':
-                    coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where cell has only one direction to be traversed.
-            elif path_dict[maze_dict[coordinate]] == 1:
-                # Asserts cell has not been visited.
-                if coordinate not in visit_list:
-                    if maze_dict[coordinate
-                                 ] == (False, True, True, False):
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                        direction = 'D'
-                    elif maze_dict[coordinate
-                                   ] == (True, True, False, False):
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                        direction = 'U'
-                    elif maze_dict[coordinate
-                                   ] == (False, True, False, True):
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-                        direction = 'L'
-
-                # Backtracks to the last junction encountered.
-                else:
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where cell has two directions possible to traverse.
-            elif path_dict[maze_dict[coordinate]] == 2:
-                # Asserts cell has not been visited.
-                if coordinate not in visit_list:
-                    if maze_dict[coordinate
-                                 ] == (False, True, True, True):
-                        visit_list.append(coordinate)
-                        if ['D', coordinate] not in visit_list:
-                            path_list.append(['D', coordinate])
-                            visit_list.append(['D', coordinate])
-                        if ['L', coordinate] not in visit_list:
-                            path_list.append(['L', coordinate])
-                            visit_list.append(['L', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['D', coordinate]:
-                            coordinate = (coordinate[0] + 1,
-                                          coordinate[1])
-                            direction = 'D'
-                        elif path_list[-2] == ['L', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] - 1)
-                            direction = 'L'
-                    elif maze_dict[coordinate
-                                   ] == (True, True, False, True):
-                        visit_list.append(coordinate)
-                        if ['U', coordinate] not in visit_list:
-                            path_list.append(['U', coordinate])
-                            visit_list.append(['R', coordinate])
-                        if ['L', coordinate] not in visit_list:
-                            path_list.append(['L', coordinate])
-                            visit_list.append(['L', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['U', coordinate]:
-                            coordinate = (coordinate[0] - 1,
-                                          coordinate[1])
-                            direction = 'U'
-                        if path_list[-2] == ['L', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] - 1)
-                            direction = 'L'
-                    elif maze_dict[coordinate
-                                   ] == (True, True, True, False):
-                        visit_list.append(coordinate)
-                        if ['U', coordinate] not in visit_list:
-                            path_list.append(['U', coordinate])
-                            visit_list.append(['U', coordinate])
-                        if ['D', coordinate] not in visit_list:
-                            path_list.append(['D', coordinate])
-                            visit_list.append(['D', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['U', coordinate]:
-                            coordinate = (coordinate[0] - 1,
-                                          coordinate[1])
-                            direction = 'U'
-                        if path_list[-2] == ['D', coordinate]:
-                            coordinate = (coordinate[0] + 1,
-                                          coordinate[1])
-                            direction = 'D'
-
-                # Backtracks to the last junction encountered.
-                else:
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-
-            # Case where cell has three possible directions to traverse.
-            elif path_dict[maze_dict[coordinate]] == 3:
-                # Asserts cell has not been visited.
-                if coordinate not in visit_list:
-                    if maze_dict[coordinate
-                                 ] == (True, True, True, True):
-                        visit_list.append(coordinate)
-                        if ['U', coordinate] not in visit_list:
-                            path_list.append(['U', coordinate])
-                            visit_list.append(['U', coordinate])
-                        if ['D', coordinate] not in visit_list:
-                            path_list.append(['D', coordinate])
-                            visit_list.append(['D', coordinate])
-                        if ['L', coordinate] not in visit_list:
-                            path_list.append(['L', coordinate])
-                            visit_list.append(['L', coordinate])
-                        path_list.append(coordinate)
-                        visit_list.append(coordinate)
-                        if path_list[-2] == ['U', coordinate]:
-                            coordinate = (coordinate[0] - 1,
-                                          coordinate[1])
-                            direction = 'R'
-                        if path_list[-2] == ['D', coordinate]:
-                            coordinate = (coordinate[0] + 1,
-                                          coordinate[1])
-                            direction = 'D'
-                        if path_list[-2] == ['L', coordinate]:
-                            coordinate = (coordinate[0],
-                                          coordinate[1] - 1)
-                            direction = 'L'
-
-                # Backtracks to the last junction encountered.
-                else:
-                    (path_list, visit_list
-                     ) = remove_paths(path_list, visit_list)
-                    if len(path_list) == 0:
-                        break
-                    while (len(path_list) > 0 and
-                           type(path_list[-1]) is tuple):
-                        (path_list, visit_list
-                         ) = remove_paths(path_list, visit_list)
-                    # Breaks if no directions left to traverse
-                    if len(path_list) == 0:
-                        break
-                    coordinate = path_list[-1][1]
-                    direction = path_list[-1][0]
-                    path_list.append(coordinate)
-                    visit_list.append(coordinate)
-                    if direction is 'U':
-                        coordinate = (coordinate[0] - 1, coordinate[1])
-                    elif direction is 'R':
-                        coordinate = (coordinate[0], coordinate[1] + 1)
-                    elif direction is 'D':
-                        coordinate = (coordinate[0] + 1, coordinate[1])
-                    elif direction is 'L':
-                        coordinate = (coordinate[0], coordinate[1] - 1)
-
-    # Filters solutions contain 'point', returns None if none detected.
-    [through_list.append(path) for path in maze_list if point in path]
-
-    # Returns None if no solutions pass 'point'.
-    if len(through_list) == 0:
-        return(None)
+###############################################################################
 
-    # Determines the shortest paths in the list of all solutions.
-    shortest_length = len(through_list[0])
-    for path in through_list:
-        if len(path) < shortest_length:
-            shortest_length = len(path)
-
-    # Returns all paths with length equivalent to 'shortest_length'.
-    [shortest_list.append(path) for path in through_list
-     if len(path) == shortest_length]
-    return(sorted(shortest_list))
-
-def maze_dictionary(maze):
-    """Creates a dictionary mapping each cell to its coordinates."""
-    # Matches each cell in the maze to its corresponding coordinates.
-    maze_dict = defaultdict(tuple)
-    for row_num, row in enumerate(maze):
-        for cell_num, cell in enumerate(row):
-            maze_dict[(row_num, cell_num)] = cell
-    return(maze_dict)
-
-def path_dictionary(path_dict):
-    """Creates a dictionary listing all possible types of cells"""
-    # Cells which are dead ends.
-    path_dict[(False, False, True, False)] = 0
-    path_dict[(False, False, False, True)] = 0
-    path_dict[(True, False, False, False)] = 0
-    path_dict[(False, True, False, False)] = 0
-    # Cells which have one direction to traverse.
-    path_dict[(False, True, True, False)] = 1
-    path_dict[(False, False, True, True)] = 1
-    path_dict[(True, False, False, True)] = 1
-    path_dict[(True, True, False, False)] = 1
-    path_dict[(True, False, True, False)] = 1
-    path_dict[(False, True, False, True)] = 1
-    # Cells which have two directions to traverse.
-    path_dict[(True, False, True, True)] = 2
-    path_dict[(True, True, True, False)] = 2
-    path_dict[(False, True, True, True)] = 2
-    path_dict[(True, True, False, True)] = 2
-    # Cells which have three directions to traverse.
-    path_dict[(True, True, True, True)] = 3
-    return(path_dict)
-
-def remove_paths(path_list, visit_list):
-    """Removes coordinates from the end of 'path_list' until a
-    'direction-coordinate list' is encountered."""
-    # Removes tuple coordinates and halts when encountered with a list.
-    for coordinate in reversed(path_list):
-        if type(coordinate) is tuple:
-            path_list.remove(coordinate)
+def generate_maze(rows, cols, seed=None, compact=False):
+    """Returns a random maze with a single acyclic path between any two
+    cells, generated with the recursive backtracker algorithm, as a list
+    of rows of (U, R, D, L) tuples or as a Maze if 'compact' is True.
+    The entry and exit points are placed at random in the first and last
+    rows, and the same seed always gives the same maze. Backtracking
+    uses an explicit stack, so the size of the maze is not limited by
+    the recursion limit."""
+    if rows < 1 or cols < 1:
+        raise ValueError('a maze needs at least one row and one column')
+    random = Random(seed).random
+    size = rows * cols
+    # Opening masks, with bit 4 flagging cells already carved into.
+    data = bytearray(size)
+    start = int(random() * size)
+    data[start] = 16
+    stack = [start]
+    while stack:
+        index = stack[-1]
+        # Gathers the adjacent cells not yet carved into.
+        options = []
+        if index >= cols and not data[index - cols]:
+            options.append(U)
+        if index % cols < cols - 1 and not data[index + 1]:
+            options.append(R)
+        if index + cols < size and not data[index + cols]:
+            options.append(D)
+        if index % cols > 0 and not data[index - 1]:
+            options.append(L)
+        # Backtracks once every adjacent cell has been carved into.
+        if len(options) == 0:
+            stack.pop()
+            continue
+        way = options[int(random() * len(options))]
+        following = index + (-cols, 1, cols, -1)[way]
+        data[index] |= 1 << way
+        data[following] = 16 | 1 << OPPOSITE[way]
+        stack.append(following)
+
+    # Opens the entry and exit points and clears the carved flags.
+    data[int(random() * cols)] |= 1 << U
+    data[size - cols + int(random() * cols)] |= 1 << D
+    grid = Maze(rows, cols, data.translate(OPENINGS_ONLY))
+    return(grid if compact else grid.to_list())
+
+
+def generate_maze_rows(rows, cols, seed=None):
+    """Yields the rows of a random maze with a single acyclic path
+    between any two cells one at a time, as lists of (U, R, D, L)
+    tuples, using Eller's algorithm. Only the sets of cells in the
+    current row which are joined through earlier rows are kept, so
+    memory grows with the number of columns alone. The entry and exit
+    points are placed at random, and the same seed always gives the same
+    maze, though not the same one as generate_maze."""
+    if rows < 1 or cols < 1:
+        raise ValueError('a maze needs at least one row and one column')
+    random = Random(seed).random
+    entry = int(random() * cols)
+    exit = int(random() * cols)
+    # Set of each cell in the current row, and the cells in each set.
+    labels = list(range(cols))
+    members = dict((label, [label]) for label in labels)
+    next_label = cols
+    up = [False] * cols
+    up[entry] = True
+
+    for row_num in range(rows):
+        last_row = row_num == rows - 1
+        # Joins adjacent cells of different sets at random, and every
+        # such pair in the last row so that the maze is connected.
+        right = [False] * cols
+        for cell_num in range(cols - 1):
+            kept, joined = labels[cell_num], labels[cell_num + 1]
+            if kept != joined and (last_row or random() < 0.5):
+                right[cell_num] = True
+                if len(members[kept]) < len(members[joined]):
+                    kept, joined = joined, kept
+                for member in members[joined]:
+                    labels[member] = kept
+                members[kept].extend(members.pop(joined))
+
+        # Opens at least one cell of each set downwards, or the exit
+        # point in the last row.
+        down = [False] * cols
+        if last_row:
+            down[exit] = True
         else:
-            # Takes note of the 'direction-coordinate list'
-            recent_direction = coordinate
-            path_list.remove(coordinate)
-            break
+            for cells in members.values():
+                chosen = [cell for cell in cells if random() < 0.5]
+                if len(chosen) == 0:
+                    chosen = [cells[int(random() * len(cells))]]
+                for cell_num in chosen:
+                    down[cell_num] = True
+
+        yield([CELLS[up[cell_num] | right[cell_num] << R |
+                     down[cell_num] << D |
+                     (cell_num > 0 and right[cell_num - 1]) << L]
+               for cell_num in range(cols)])
+
+        # Cells below the current row share the set of the cell above
+        # them if they are joined to it, otherwise they start a new set.
+        members = {}
+        for cell_num in range(cols):
+            if not down[cell_num]:
+                labels[cell_num] = next_label
+                next_label += 1
+            members.setdefault(labels[cell_num], []).append(cell_num)
+        up = down
+
+
+def braid_maze(maze, fraction=1.0, seed=None):
+    """Returns a copy of the maze in which about 'fraction' of the dead
+    ends, cells open in a single direction, are opened into an adjacent
+    cell, adding loops to the maze. Dead ends are opened into adjacent
+    dead ends where possible, and the same seed always gives the same
+    maze. Returns a Maze if given one and a list of rows otherwise."""
+    grid = as_maze(maze)
+    cols = grid.cols
+    size = len(grid.data)
+    data = bytearray(grid.data[:])
+    random = Random(seed).random
+    for index in range(size):
+        # Dead ends may already have been opened from an earlier cell.
+        if data[index] not in (1, 2, 4, 8) or random() >= fraction:
+            continue
+        closed = []
+        if index >= cols and not data[index] & 1 << U:
+            closed.append(U)
+        if index % cols < cols - 1 and not data[index] & 1 << R:
+            closed.append(R)
+        if index + cols < size and not data[index] & 1 << D:
+            closed.append(D)
+        if index % cols > 0 and not data[index] & 1 << L:
+            closed.append(L)
+        if len(closed) == 0:
+            continue
+        dead_ends = [way for way in closed if
+                     data[index + (-cols, 1, cols, -1)[way]] in (1, 2, 4, 8)]
+        options = dead_ends or closed
+        way = options[int(random() * len(options))]
+        data[index] |= 1 << way
+        data[index + (-cols, 1, cols, -1)[way]] |= 1 << OPPOSITE[way]
+    braided = Maze(grid.rows, cols, data)
+    return(braided if isinstance(maze, Maze) else braided.to_list())
 
-    # Does not remove the 'direction-coordinate list' to prevent
-    # algorithm from traversing back through the same path.
-    for coordinate in reversed(visit_list):
-        if coordinate != recent_direction:
-            visit_list = visit_list[:-1]
-        else:
-            break
-    return(path_list, visit_list)
+###############################################################################
+
+class MazeTimeout(Exception):
+    """Raised within a time_limit block which runs out of time."""
+
+
+def process_mazes(mazes, point=None, workers=None, chunksize=64,
+                  ordered=True, timeout=None, solve=True, render=False,
+                  maze_format='auto'):
+    """Yields the result of process_maze for each of 'mazes', spread
+    across 'workers' processes (by default one per CPU). 'mazes' is an
+    iterable of mazes or of paths to maze files, or the path of a
+    directory whose files are read in name order. Mazes are sent to the
+    workers in chunks of 'chunksize' to spread the cost of pickling, and
+    only a few chunks per worker are pending at once, so 'mazes' may be
+    a generator of any length. Results are yielded in input order if
+    'ordered' is True, and as soon as their chunk completes otherwise;
+    the 'index' of each result is the position of its maze in 'mazes'.
+    'point', 'timeout', 'solve', 'render' and 'maze_format' are passed
+    to process_maze for every maze."""
+    if isinstance(mazes, str) and os.path.isdir(mazes):
+        mazes = maze_files(mazes)
+    workers = workers or os.cpu_count() or 1
+    pending = deque()
+    with ProcessPoolExecutor(workers) as executor:
+        for chunk in iter_chunks(enumerate(mazes), chunksize):
+            pending.append(executor.submit(process_chunk, chunk, point,
+                                           timeout, solve, render,
+                                           maze_format))
+            if len(pending) >= 4 * workers:
+                for result in finished_chunks(pending, ordered):
+                    yield(result)
+        while pending:
+            for result in finished_chunks(pending, ordered):
+                yield(result)
+
+
+def finished_chunks(pending, ordered):
+    """Removes the next chunk from the deque of futures 'pending', or if
+    'ordered' is False every chunk which has completed, waiting for one
+    if need be, and returns their results."""
+    if ordered:
+        return(pending.popleft().result())
+    done = wait(pending, return_when=FIRST_COMPLETED)[0]
+    results = []
+    for future in list(pending):
+        if future in done:
+            pending.remove(future)
+            results.extend(future.result())
+    return(results)
+
+
+def iter_chunks(items, size):
+    """Yields lists of 'size' consecutive items, the last list holding
+    whatever is left over."""
+    items = iter(items)
+    chunk = list(islice(items, size))
+    while chunk:
+        yield(chunk)
+        chunk = list(islice(items, size))
+
+
+def maze_files(directory):
+    """Returns the paths of the files in 'directory' in name order."""
+    paths = [os.path.join(directory, name)
+             for name in sorted(os.listdir(directory))]
+    return([path for path in paths if os.path.isfile(path)])
+
+
+def process_chunk(chunk, point=None, timeout=None, solve=True, render=False,
+                  maze_format='auto'):
+    """Returns a list of the result of process_maze for each maze of a
+    chunk of (index, maze) pairs, with the index added to each result."""
+    results = []
+    for index, maze in chunk:
+        result = process_maze(maze, point, timeout, solve, render,
+                              maze_format)
+        result['index'] = index
+        results.append(result)
+    return(results)
+
+
+def process_maze(maze, point=None, timeout=None, solve=True, render=False,
+                 maze_format='auto'):
+    """Returns a dictionary of the results of validating a maze and, if
+    it is valid, solving it with solve_maze if 'solve' is True, finding
+    its shortest_paths through 'point' if given, and drawing it with
+    visualise_maze if 'render' is True. 'point' may also be a
+    function returning the point of a given maze, such as
+    get_exit_point. 'maze' may be the path of a maze file, which is read
+    with read_maze_file in 'maze_format'. The dictionary holds:
+        'source': the path of the maze file, or None,
+        'valid': whether the maze is valid,
+        'violation': the first constraint the maze violates, as returned
+            by find_violation, or None,
+        'solution': the path returned by solve_maze, or None,
+        'solved': whether solve_maze found a path, False if it gave up,
+            or None if the maze was not solved,
+        'shortest_paths': the paths returned by shortest_paths, or None,
+        'rendering': the drawing returned by visualise_maze, or None,
+        'error': 'timeout' if the maze took longer than 'timeout'
+            seconds, a message if it could not be read, or None,
+        'seconds': the time the maze took."""
+    start = perf_counter()
+    result = {'source': maze if isinstance(maze, str) else None,
+              'valid': False, 'violation': None, 'solution': None,
+              'solved': None, 'shortest_paths': None, 'rendering': None,
+              'error': None}
+    try:
+        with time_limit(timeout):
+            if result['source'] is not None:
+                maze = read_maze_file(maze, maze_format)
+            result['violation'] = find_violation(maze)
+            if result['violation'] is None:
+                result['valid'] = True
+                grid = as_maze(maze)
+                if solve:
+                    result['solution'] = solve_maze(grid)
+                    result['solved'] = result['solution'] is not None
+                if render:
+                    result['rendering'] = visualise_maze(
+                        grid, [result['solution']])
+                if point is not None:
+                    result['shortest_paths'] = shortest_paths(
+                        grid, point(grid) if callable(point) else point)
+    except MazeTimeout:
+        result['error'] = 'timeout'
+    except (IndexError, OSError, SyntaxError, TypeError,
+            ValueError) as error:
+        result['error'] = str(error)
+    result['seconds'] = perf_counter() - start
+    return(result)
+
+
+@contextmanager
+def time_limit(seconds):
+    """Raises MazeTimeout within the block once it has run for 'seconds'
+    seconds, using a SIGALRM interval timer. The block runs without a
+    limit if 'seconds' is None or the platform has no interval timers.
+    Only usable from the main thread, as in a worker process."""
+    if seconds is None or not hasattr(signal, 'setitimer'):
+        yield
+        return
+
+    def expire(signum, frame):
+        raise MazeTimeout('time limit of %g seconds exceeded' % seconds)
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
 
 ###############################################################################
 
-if __name__ == '__main__':
+def main(argv=None):
+    """Runs the command line interface with the arguments 'argv', by
+    default those the program was run with, and returns its exit status:
+    0 if every maze was valid and processed, 1 otherwise."""
+    parser = argparse.ArgumentParser(
+        prog='recursive-backtracker',
+        description='Validates, solves, draws or finds the shortest paths '
+        'of mazes read from files or standard input, across worker '
+        'processes, writing a JSON object for each maze to standard '
+        'output, one per line, with the time it took.')
+    parser.add_argument('command', choices=('validate', 'solve', 'shortest',
+                                            'render', 'demo'),
+                        help="what to do with each maze, where 'shortest' "
+                        "finds its shortest paths through --point, "
+                        "'render' writes its drawing instead of JSON, and "
+                        "'demo' prints examples of every function")
+    parser.add_argument('inputs', nargs='*', default=['-'],
+                        help="maze files or directories of them, or '-' "
+                        "for standard input (default)")
+    parser.add_argument('-f', '--format', default='auto',
+                        choices=('auto', 'jsonl', 'binary', 'text'),
+                        help="format of the mazes: 'jsonl' for a JSON list "
+                        "of rows of [U, R, D, L] booleans on each line, "
+                        "'binary' for the binary maze format, 'text' for "
+                        "the drawing of visualise_maze, for files and "
+                        "standard input alike. 'auto' reads files ending "
+                        "in .jsonl as JSON Lines and detects the format "
+                        "of other files, and reads standard input as JSON "
+                        "Lines (default: %(default)s)")
+    parser.add_argument('-p', '--point', default='exit',
+                        type=lambda text: text if text == 'exit' else
+                        tuple(int(number) for number in text.split(',')),
+                        help="cell the shortest paths pass through, as "
+                        "'row,column', or 'exit' (default: %(default)s)")
+    parser.add_argument('-j', '--workers', default=None, type=int,
+                        help='worker processes (default: one per CPU)')
+    parser.add_argument('--chunksize', default=64, type=int,
+                        help='mazes sent to a worker at once (default: '
+                        '%(default)s)')
+    parser.add_argument('--timeout', default=None, type=float,
+                        help='seconds each maze may take (default: none)')
+    parser.add_argument('--unordered', action='store_true',
+                        help='write results as soon as they are ready '
+                        'rather than in input order')
+    options = parser.parse_intermixed_args(argv)
+    if options.command == 'demo':
+        demo()
+        return(0)
+
+    point = None
+    if options.command == 'shortest':
+        point = get_exit_point if options.point == 'exit' else options.point
+    # Labels of the mazes whose results are still to come, by index.
+    labels = {}
+    mazes = labelled_mazes(options.inputs, options.format, labels)
+    failed = False
+    try:
+        for result in process_mazes(
+                mazes, point, options.workers, options.chunksize,
+                not options.unordered, options.timeout,
+                solve=options.command in ('solve', 'render'),
+                render=options.command == 'render',
+                maze_format=options.format):
+            result['source'] = labels.pop(result['index'])
+            failed = failed or not result['valid'] or result['error']
+            if options.command == 'render':
+                sys.stderr.write('%s: %.6fs%s\n' % (
+                    result['source'], result['seconds'],
+                    ', solver gave up' if result['solved'] is False else ''))
+                sys.stdout.write(result['rendering'] or
+                                 '%s\n' % (result['error'] or
+                                           result['violation'],))
+                sys.stdout.write('\n')
+                continue
+            del result['rendering']
+            if options.command != 'solve':
+                del result['solution']
+                del result['solved']
+            if options.command != 'shortest':
+                del result['shortest_paths']
+            sys.stdout.write(json.dumps(result, sort_keys=True) + '\n')
+    except (OSError, ValueError) as error:
+        parser.exit(1, '%s: error: %s\n' % (parser.prog, error))
+    return(1 if failed else 0)
+
+
+def labelled_mazes(inputs, maze_format, labels):
+    """Yields the mazes of each of 'inputs', as read by main, recording a
+    label for each in 'labels' by its position: the path of its file or
+    '-' for standard input, and its line number for JSON Lines."""
+    index = 0
+    for source in inputs:
+        if source != '-' and os.path.isdir(source):
+            paths = maze_files(source)
+        else:
+            paths = [source]
+        for path in paths:
+            jsonl = (maze_format == 'jsonl' or maze_format == 'auto' and
+                     (path == '-' or path.endswith('.jsonl')))
+            # Binary files may hold several mazes one after another, so
+            # they are read here like standard input.
+            binary = (path != '-' and maze_format in ('auto', 'binary') and
+                      not jsonl and is_binary_maze_file(path))
+            if path != '-' and not jsonl and not binary:
+                # Other files are read by the worker processes.
+                labels[index] = path
+                index += 1
+                yield(path)
+                continue
+            for line_num, maze in read_mazes(
+                    path, 'binary' if binary else maze_format, jsonl):
+                labels[index] = path if line_num is None else '%s:%d' % (
+                    path, line_num)
+                index += 1
+                yield(maze)
+
+
+def read_mazes(path, maze_format, jsonl):
+    """Yields (line number, maze) pairs for each maze of the file at
+    'path', or of standard input if 'path' is '-', read as JSON Lines if
+    'jsonl' is True or otherwise in 'maze_format', with a line number of
+    None unless reading JSON Lines."""
+    if jsonl:
+        stream = sys.stdin if path == '-' else open(path)
+        try:
+            for line_num, line in enumerate(stream, 1):
+                if not line.strip():
+                    continue
+                try:
+                    maze = json.loads(line)
+                except ValueError as error:
+                    raise ValueError('%s:%d: %s' % (path, line_num, error))
+                try:
+                    maze = [[tuple(cell) for cell in row] for row in maze]
+                except TypeError:
+                    # Left for the workers to report as invalid.
+                    pass
+                yield((line_num, maze))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+    elif maze_format == 'text':
+        yield((None, parse_visual_maze(sys.stdin, compact=True)))
+    else:
+        stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        try:
+            for maze in read_binary_mazes(stream):
+                yield((None, maze))
+        except ValueError as error:
+            raise ValueError('%s: %s' % (path, error))
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+
+def demo():
+    """Prints examples of each function on small mazes."""
     print('Maze Validation')
     # True
     print(is_valid_maze([[(True, True, False, False), (False, False, True, True)], [(False, True, True, False), (True, False, False, True)]]))
@@ -1826,3 +2503,8 @@ if __name__ == '__main__':
     print(shortest_paths([[(True, True, True, False), (False, True, True, True), (False, False, True, True)], [(True, True, True, False), (True, True, True, True), (True, False, True, True)], [(True, True, False, False), (True, True, False, True), (True, False, True, True)]], (0, 0)))
     print(shortest_paths([[(True, False, True, False), (False, False, True, False)], [(True, False, False, False), (True, False, True, False)]], (0, 0)))
     print(shortest_paths([[(False, False, True, False), (True, False, True, False), (False, False, True, False)], [(True, True, True, False), (True,  True,  True, True), (True, False, True, True)], [(True, True, False, False), (True,  True,  True, True), (True, False, False, True)]], (0, 0)))
+
+###############################################################################
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Checks of the benchmark suite and its regression comparison on small
+cases. Run from the repository root with:
+
+    python -m pytest tests
+"""
+import os
+import sys
+from itertools import combinations
+from random import Random
+from statistics import median
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'benchmarks'))
+from benchmark import BENCHMARKS, parse_arguments, run_benchmarks  # noqa: E402
+from compare import compare, mann_whitney_p  # noqa: E402
+
+###############################################################################
+
+def test_run_benchmarks_reports_every_case():
+    options = parse_arguments(['--sizes', '2,5', '--repeat', '3'])
+    report = run_benchmarks(options)
+    keys = [(result['function'], result['topology'], result['rows'])
+            for result in report['results']]
+    assert len(set(keys)) == len(keys)
+    assert set(name for name, topology, size in keys) >= set(
+        name for name, function, topologies in BENCHMARKS
+        if not name.endswith('[numpy]'))
+    for result in report['results']:
+        assert len(result['times']) == 3
+        assert min(result['times']) <= result['median'] <= result['p95']
+        assert result['p95'] <= max(result['times'])
+        assert result['peak_memory'] >= 0
+        if result['function'] == 'shortest_paths':
+            assert result['complete']
+
+
+def timing_case(times, peak_memory=1000):
+    """Returns the baseline entry of a case run in the given times."""
+    return({'times': times, 'median': median(times), 'p95': max(times),
+            'peak_memory': peak_memory})
+
+
+def test_mann_whitney_p_matches_every_ordering():
+    random = Random(22)
+    for trial in range(50):
+        n, m = random.randint(1, 5), random.randint(1, 5)
+        values = random.sample(range(100), n + m)
+        sample, other = values[:n], values[n:]
+        u = sum(x > y for x in sample for y in other)
+        splits = list(combinations(values, n))
+        at_least = [split for split in splits
+                    if sum(x > y for x in split for y in values
+                           if y not in split) >= u]
+        assert abs(mann_whitney_p(sample, other) -
+                   len(at_least) / float(len(splits))) < 1e-9
+
+
+def test_compare_classifies_cases():
+    times = [1.0 + run * 0.01 for run in range(10)]
+    baseline = {'environment': {}, 'cases': dict(
+        (key, timing_case(times))
+        for key in ('same', 'slower', 'faster', 'larger', 'gone'))}
+    current = {'environment': {}, 'cases': {
+        'same': timing_case(times[::-1]),
+        'slower': timing_case([time * 2 for time in times]),
+        'faster': timing_case([time / 2 for time in times]),
+        'larger': timing_case(times, 4096),
+        'added': timing_case(times)}}
+    statuses = dict((difference['key'], difference['status'])
+                    for difference in compare(baseline, current))
+    assert statuses == {'same': 'ok', 'slower': 'regression',
+                        'faster': 'improvement', 'larger': 'regression',
+                        'added': 'new', 'gone': 'missing'}
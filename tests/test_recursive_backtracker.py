@@ -0,0 +1,935 @@
+"""Randomised checks of recursive_backtracker against exhaustive searches
+and the original implementations it replaced. Run from the repository
+root with:
+
+    python -m pytest tests
+"""
+import json
+import os
+import sys
+import threading
+from io import StringIO
+from itertools import islice
+from random import Random
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'src'))
+from recursive_backtracker import (  # noqa: E402
+    D, L, MAZE_FILE_HEADER, R, TRACE_BACKTRACK, TRACE_FILE_HEADER,
+    TRACE_JUNCTION, TRACE_SOLUTION, TRACE_VISIT, U, Maze, OverlappingPaths,
+    SearchBudget, SolverStats, as_maze, bounded_count_shortest_paths,
+    bounded_shortest_paths, braid_maze, constraint_0, constraint_1,
+    constraint_2, constraint_3, constraint_4, constraint_5, constraint_6,
+    constraint_7, constraint_8a, constraint_8b, count_shortest_paths,
+    disjoint_paths, find_violation, generate_maze, generate_maze_rows,
+    get_entry_point, get_exit_point, is_valid_maze, iter_shortest_paths,
+    iter_shortest_walks, iter_trace, load_maze, main, open_cells,
+    parse_visual_maze, process_maze, process_mazes, read_binary_mazes,
+    read_trace, save_maze, shortest_paths, shortest_paths_search, solve_maze,
+    validation_report, visualise_maze, write_trace, write_visual_maze)
+
+###############################################################################
+
+def random_maze(random, max_side=6, malformed=False):
+    """Returns a random valid maze of up to 'max_side' rows and columns as
+    a list of rows of tuples. Its passages form a random spanning tree of
+    the cells with a random fraction of the other inner walls removed,
+    adding loops. If 'malformed', some openings are then flipped so that
+    the adjacent cell no longer matches them, leaving the entry and exit
+    points in place."""
+    rows = random.randint(1, max_side)
+    cols = random.randint(1, max_side)
+    cells = [[[False] * 4 for col_num in range(cols)]
+             for row_num in range(rows)]
+    walls = [(row_num, col_num, way) for row_num in range(rows)
+             for col_num in range(cols) for way in (R, D)
+             if (col_num < cols - 1 if way == R else row_num < rows - 1)]
+    random.shuffle(walls)
+    # Sets of joined cells, as a forest of parent indices.
+    parent = list(range(rows * cols))
+
+    def find(index):
+        while parent[index] != index:
+            index = parent[index]
+        return(index)
+
+    loops = random.random() / 2
+    for row_num, col_num, way in walls:
+        next_row, next_col = ((row_num, col_num + 1) if way == R
+                              else (row_num + 1, col_num))
+        first = find(row_num * cols + col_num)
+        second = find(next_row * cols + next_col)
+        if first != second or random.random() < loops:
+            parent[first] = second
+            cells[row_num][col_num][way] = True
+            cells[next_row][next_col][(way + 2) % 4] = True
+    cells[0][random.randrange(cols)][U] = True
+    cells[-1][random.randrange(cols)][D] = True
+    if malformed:
+        for flip in range(random.randint(1, 3)):
+            row_num = random.randrange(rows)
+            col_num = random.randrange(cols)
+            cell = cells[row_num][col_num]
+            direction = random.choice((R, L) + ((U,) if row_num else ()) +
+                                      ((D,) if row_num < rows - 1 else ()))
+            cell[direction] = not cell[direction]
+    return([[tuple(cell) for cell in row] for row in cells])
+
+
+# The constraints checked in turn by the original is_valid_maze.
+CONSTRAINTS = (constraint_0, constraint_1, constraint_2, constraint_3,
+               constraint_4, constraint_5, constraint_6, constraint_7,
+               constraint_8a, constraint_8b)
+
+# Ways in which malformed_maze breaks a maze.
+MALFORMATIONS = ('flipped', 'side', 'entries', 'exits', 'closed', 'ragged',
+                 'empty')
+
+
+def malformed_maze(random, kind):
+    """Returns a random maze broken in the way named by 'kind', one of
+    MALFORMATIONS, or left valid if 'kind' is 'valid'."""
+    if kind == 'empty':
+        return(random.choice(([], [[]], [[], []])))
+    cells = [[list(cell) for cell in row]
+             for row in random_maze(random, malformed=kind == 'flipped')]
+    row_num = random.randrange(len(cells))
+    col_num = random.randrange(len(cells[0]))
+    if kind == 'side':
+        if random.random() < 0.5:
+            cells[row_num][0][L] = True
+        else:
+            cells[row_num][-1][R] = True
+    elif kind == 'entries':
+        cells[0][col_num][U] = not cells[0][col_num][U]
+    elif kind == 'exits':
+        cells[-1][col_num][D] = not cells[-1][col_num][D]
+    elif kind == 'closed':
+        cells[row_num][col_num] = [False] * 4
+    elif kind == 'ragged':
+        del cells[row_num][-1]
+    return([[tuple(cell) for cell in row] for row in cells])
+
+
+def first_failing_constraint(maze):
+    """Returns the name of the first constraint which the original
+    is_valid_maze found the maze to violate, or None if it is valid."""
+    for constraint in CONSTRAINTS:
+        if constraint(maze) is False:
+            return(constraint.__name__)
+    return(None)
+
+
+def enumerate_shortest_paths(maze, point):
+    """Returns the shortest acyclic paths from the entry point to the exit
+    point which pass through 'point', found by trying every acyclic path,
+    or None if there are none."""
+    entry = get_entry_point(maze)
+    exit = get_exit_point(maze)
+    if entry == exit:
+        return(None)
+    rows = len(maze)
+    cols = len(maze[0])
+    paths = []
+
+    def extend(path):
+        if path[-1] == exit:
+            if point in path:
+                paths.append(path)
+            return
+        row_num, col_num = path[-1]
+        for way, next_cell in ((U, (row_num - 1, col_num)),
+                               (R, (row_num, col_num + 1)),
+                               (D, (row_num + 1, col_num)),
+                               (L, (row_num, col_num - 1))):
+            if (maze[row_num][col_num][way] and 0 <= next_cell[0] < rows and
+               0 <= next_cell[1] < cols and next_cell not in path):
+                extend(path + [next_cell])
+
+    extend([entry])
+    if not paths:
+        return(None)
+    length = min(len(path) for path in paths)
+    return(sorted(path for path in paths if len(path) == length))
+
+
+def open_grid(rows, cols):
+    """Returns a maze with every inner wall removed, entered at the top
+    left and left at the bottom left."""
+    return([[(row_num > 0 or col_num == 0, col_num < cols - 1,
+              row_num < rows - 1 or col_num == 0, col_num > 0)
+             for col_num in range(cols)] for row_num in range(rows)])
+
+
+def corner_maze(side, way_out):
+    """Returns an open grid whose bottom right cell is open only upwards
+    and, if 'way_out' is True, to the left, the way to the exit."""
+    maze = open_grid(side, side)
+    maze[side - 1][side - 1] = (True, False, False, way_out)
+    maze[side - 1][side - 2] = (True, way_out, False, True)
+    return(maze)
+
+
+def is_perfect(maze):
+    """Returns True if there is exactly one path between any two cells of
+    a valid maze: its cells are connected by one fewer passage than
+    there are cells."""
+    rows = len(maze)
+    cols = len(maze[0])
+    neighbours = dict(((row_num, col_num), []) for row_num in range(rows)
+                      for col_num in range(cols))
+    passages = 0
+    for row_num, row in enumerate(maze):
+        for col_num, cell in enumerate(row):
+            if cell[R]:
+                passages += 1
+                neighbours[row_num, col_num].append((row_num, col_num + 1))
+                neighbours[row_num, col_num + 1].append((row_num, col_num))
+            if cell[D] and row_num < rows - 1:
+                passages += 1
+                neighbours[row_num, col_num].append((row_num + 1, col_num))
+                neighbours[row_num + 1, col_num].append((row_num, col_num))
+    reached = set([(0, 0)])
+    stack = [(0, 0)]
+    while stack:
+        for next_cell in neighbours[stack.pop()]:
+            if next_cell not in reached:
+                reached.add(next_cell)
+                stack.append(next_cell)
+    return(passages == rows * cols - 1 and len(reached) == rows * cols)
+
+
+def reference_visualise_maze(maze):
+    """The original renderer, which visualise_maze must match byte for
+    byte."""
+    visual = '_'
+    for cell in maze[0]:
+        visual += ('  ' if cell[U] else '__')
+    visual += '\n'
+    for row in maze:
+        visual += ('|' if not row[0][L] else '')
+        for cell in row:
+            visual += (' ' if cell[D] and not cell[R] else '')
+            visual += ('  ' if cell[D] and cell[R] else '')
+            visual += ('_' if not cell[D] and not cell[R] else '')
+            visual += ('_ ' if not cell[D] and cell[R] else '')
+            visual += ('|' if cell[R] is False else '')
+        visual += '\n'
+    return(visual)
+
+###############################################################################
+
+def test_maze_round_trips_lists():
+    random = Random(1)
+    for trial in range(100):
+        maze = random_maze(random, max_side=9, malformed=trial % 2 == 1)
+        grid = Maze.from_list(maze)
+        assert (grid.rows, grid.cols) == (len(maze), len(maze[0]))
+        assert len(grid) == len(maze)
+        assert grid.to_list() == maze
+        assert list(grid) == [tuple(row) for row in maze]
+        assert grid[-1] == tuple(maze[-1])
+        assert Maze.from_list(grid.to_list()) == grid
+    for maze in ([[(True, False, True, False)], []], [[(True, False)]]):
+        with pytest.raises(ValueError):
+            Maze.from_list(maze)
+
+
+def test_find_violation_matches_constraints():
+    random = Random(2)
+    for trial in range(500):
+        maze = malformed_maze(random, random.choice(MALFORMATIONS +
+                                                    ('valid',)))
+        violation = find_violation(maze)
+        assert (violation is None) == (first_failing_constraint(maze) is
+                                        None)
+        assert is_valid_maze(maze) == (violation is None)
+        if violation is not None:
+            constraint = dict((constraint.__name__, constraint)
+                              for constraint in CONSTRAINTS)[violation[0]]
+            assert constraint(maze) is False
+
+
+def test_validation_report_lists_every_violation():
+    random = Random(3)
+    timings = {}
+    for trial in range(500):
+        maze = malformed_maze(random, random.choice(MALFORMATIONS +
+                                                    ('valid',)))
+        report = validation_report(maze, timings)
+        violation = find_violation(maze)
+        assert report['valid'] == (violation is None)
+        names = set(name for name, coordinate in report['violations'])
+        # Checking stops at an empty maze or rows of unequal length.
+        first = first_failing_constraint(maze)
+        if first in ('constraint_0', 'constraint_1'):
+            assert names == set([first])
+            continue
+        assert violation is None or violation in report['violations']
+        assert names == set(constraint.__name__ for constraint in CONSTRAINTS
+                            if constraint(maze) is False)
+    assert set(timings) == set(constraint.__name__
+                               for constraint in CONSTRAINTS)
+
+
+@pytest.mark.parametrize('kind', MALFORMATIONS)
+def test_numpy_backend_matches_python(kind):
+    pytest.importorskip('numpy')
+    random = Random(4)
+    for trial in range(100):
+        maze = malformed_maze(random, kind)
+        assert is_valid_maze(maze, backend='numpy') == is_valid_maze(maze)
+        if kind != 'ragged':
+            grid = Maze.from_list(maze)
+            assert is_valid_maze(grid, backend='numpy') == (
+                is_valid_maze(maze))
+
+
+def test_maze_caches_entry_and_exit_points():
+    random = Random(5)
+    for trial in range(100):
+        maze = random_maze(random)
+        grid = Maze.from_list(maze)
+        assert grid.entry_point == get_entry_point(maze)
+        assert grid.exit_point == get_exit_point(maze)
+        assert get_entry_point(grid) is grid.entry_point
+        assert get_exit_point(grid) is grid.exit_point
+
+
+def test_generate_maze_is_seeded_and_perfect():
+    for seed in range(30):
+        rows, cols = 1 + seed % 7, 1 + seed // 3
+        maze = generate_maze(rows, cols, seed)
+        assert is_valid_maze(maze) and is_perfect(maze)
+        assert generate_maze(rows, cols, seed) == maze
+        assert generate_maze(rows, cols, seed, compact=True).to_list() == (
+            maze)
+
+
+def test_generate_maze_rows_streams_perfect_mazes():
+    for seed in range(30):
+        rows, cols = 1 + seed % 7, 1 + seed // 3
+        maze = list(generate_maze_rows(rows, cols, seed))
+        assert is_valid_maze(maze) and is_perfect(maze)
+        assert list(generate_maze_rows(rows, cols, seed)) == maze
+    # Rows are yielded as they are made, however many there are to come.
+    assert len(next(generate_maze_rows(10 ** 9, 5, 12))) == 5
+
+
+def test_find_violation_reads_rows_once():
+    random = Random(13)
+    for trial in range(200):
+        maze = malformed_maze(random, random.choice(MALFORMATIONS +
+                                                    ('valid',)))
+        assert find_violation(iter(maze)) == find_violation(maze)
+        assert is_valid_maze(row for row in maze) == is_valid_maze(maze)
+    assert is_valid_maze(generate_maze_rows(50, 20, 13))
+
+
+def test_braid_maze_opens_dead_ends():
+    for seed in range(20):
+        maze = generate_maze(2 + seed % 5, 2 + seed // 4, seed)
+        braided = braid_maze(maze, seed=seed)
+        assert braid_maze(maze, seed=seed) == braided
+        assert braid_maze(maze, 0.0, seed) == maze
+        assert braid_maze(as_maze(maze), seed=seed) == as_maze(braided)
+        assert is_valid_maze(braided)
+        for row, braided_row in zip(maze, braided):
+            for cell, braided_cell in zip(row, braided_row):
+                assert all(braided_cell[way] for way in (U, R, D, L)
+                           if cell[way])
+                assert sum(braided_cell) > 1
+
+###############################################################################
+
+@pytest.mark.parametrize('malformed', (False, True))
+def test_shortest_walks_match_enumeration(malformed):
+    random = Random(6)
+    for trial in range(300):
+        maze = random_maze(random, malformed=malformed)
+        point = (random.randrange(len(maze)), random.randrange(len(maze[0])))
+        walks = list(iter_shortest_walks(as_maze(maze), point))
+        # Without acyclic walks the paths are left to shortest_paths_search.
+        if walks:
+            assert walks == enumerate_shortest_paths(maze, point)
+
+
+@pytest.mark.parametrize('way_out', (False, True))
+def test_shortest_walks_abandon_paths_which_cannot_finish(way_out):
+    small = corner_maze(5, way_out)
+    assert list(iter_shortest_walks(as_maze(small), (4, 4))) == (
+        enumerate_shortest_paths(small, (4, 4)) or [])
+    # Most shortest paths to the corner cut off the way on from it.
+    budget = SearchBudget(max_steps=100000)
+    walks = iter_shortest_walks(as_maze(corner_maze(20, way_out)), (19, 19),
+                                budget)
+    assert len(list(islice(walks, 100))) == (100 if way_out else 0)
+    assert not budget.exhausted
+
+
+def test_iter_shortest_paths_limit_yields_prefix():
+    random = Random(7)
+    for trial in range(200):
+        maze = random_maze(random)
+        point = (random.randrange(len(maze)), random.randrange(len(maze[0])))
+        paths = list(iter_shortest_walks(as_maze(maze), point))
+        if not paths:
+            continue
+        assert list(iter_shortest_paths(maze, point)) == paths
+        for limit in range(len(paths) + 2):
+            assert list(iter_shortest_paths(maze, point, limit)) == (
+                paths[:limit])
+
+
+def test_count_shortest_paths_matches_enumeration():
+    random = Random(8)
+    for trial in range(300):
+        maze = random_maze(random)
+        point = (random.randrange(len(maze)), random.randrange(len(maze[0])))
+        expected = enumerate_shortest_paths(maze, point)
+        try:
+            counted = count_shortest_paths(maze, point)
+        except OverlappingPaths:
+            continue
+        assert counted == ((len(expected), len(expected[0])) if expected
+                           else (0, None))
+
+
+def test_count_shortest_paths_refuses_overlapping_halves():
+    with pytest.raises(OverlappingPaths):
+        count_shortest_paths(open_grid(20, 20), (10, 19))
+
+
+@pytest.mark.parametrize('malformed', (False, True))
+def test_shortest_paths_match_enumeration(malformed):
+    random = Random(9)
+    for trial in range(300):
+        maze = random_maze(random, malformed=malformed)
+        point = (random.randrange(len(maze)), random.randrange(len(maze[0])))
+        expected = enumerate_shortest_paths(maze, point)
+        assert shortest_paths(maze, point) == expected
+        assert shortest_paths_search(maze, point) == expected
+
+
+def test_disjoint_paths_are_shortest_disjoint_pairs():
+    random = Random(9)
+    for trial in range(200):
+        grid = as_maze(random_maze(random, max_side=5))
+        size = len(grid.data)
+        if size < 3:
+            continue
+        start, target, exit = random.sample(range(size), 3)
+        on_path = bytearray(size)
+        on_path[start] = 1
+        paths = disjoint_paths(grid, start, target, exit, on_path)
+        # The shortest route from 'start' through 'target' to the exit,
+        # with openings leading both ways, is the same pair of paths.
+        cols = grid.cols
+        symmetric = Maze.from_list([
+            [tuple(bool(grid.data[index] & 1 << way) or bool(
+                neighbour is not None and
+                grid.data[neighbour] & 1 << (way + 2) % 4)
+                for way, neighbour in enumerate((
+                    index - cols if index >= cols else None,
+                    index + 1 if index % cols < cols - 1 else None,
+                    index + cols if index + cols < size else None,
+                    index - 1 if index % cols > 0 else None)))
+             for index in range(row_num * cols, (row_num + 1) * cols)]
+            for row_num in range(grid.rows)])
+        routes = []
+
+        def extend(route):
+            if route[-1] == exit:
+                if target in route:
+                    routes.append(route)
+                return
+            for next_cell in open_cells(symmetric, route[-1]):
+                if next_cell not in route:
+                    extend(route + [next_cell])
+
+        extend([start])
+        if not routes:
+            assert paths is None
+            continue
+        to_start, to_exit = paths
+        assert to_start[0] == target == to_exit[0]
+        assert to_start[-1] == start and to_exit[-1] == exit
+        assert len(set(to_start + to_exit)) == len(to_start + to_exit) - 1
+        assert len(to_start) + len(to_exit) - 1 == min(map(len, routes))
+
+
+def test_solve_maze_follows_openings():
+    random = Random(10)
+    moves = {(-1, 0): U, (0, 1): R, (1, 0): D, (0, -1): L}
+    solved = 0
+    for trial in range(300):
+        maze = random_maze(random, max_side=8)
+        path = solve_maze(maze)
+        assert solve_maze(Maze.from_list(maze)) == path
+        if path is None:
+            continue
+        solved += 1
+        assert path[0] == get_entry_point(maze)
+        assert path[-1] == get_exit_point(maze)
+        for cell, next_cell in zip(path, path[1:]):
+            way = moves[next_cell[0] - cell[0], next_cell[1] - cell[1]]
+            assert maze[cell[0]][cell[1]][way]
+    assert solved > 0
+    assert solve_maze([[(True, True, False, False), (False, False, True, True)],
+                       [(False, True, True, False), (True, False, False, True)]]
+                      ) == [(0, 0), (0, 1), (1, 1), (1, 0)]
+
+
+def test_bounded_searches_match_unbounded():
+    random = Random(20)
+    for trial in range(200):
+        maze = random_maze(random)
+        point = (random.randrange(len(maze)), random.randrange(len(maze[0])))
+        paths = shortest_paths(maze, point)
+        assert bounded_shortest_paths(maze, point) == (paths, True)
+        counted = (len(paths), len(paths[0])) if paths else (0, None)
+        assert bounded_count_shortest_paths(maze, point) == (counted, True)
+
+
+def test_search_budget_stops_search():
+    maze = open_grid(20, 20)
+    paths, complete = bounded_shortest_paths(maze, (10, 19), max_steps=1000)
+    assert not complete
+    (count, length), complete = bounded_count_shortest_paths(
+        maze, (10, 19), max_steps=1000)
+    assert not complete and count == len(paths)
+
+
+def test_solver_stats_count_hook_calls():
+    random = Random(23)
+    for trial in range(100):
+        maze = random_maze(random)
+        point = (random.randrange(len(maze)), random.randrange(len(maze[0])))
+        for search, args in ((solve_maze, ()), (shortest_paths, (point,))):
+            calls = dict((kind, 0) for kind in ('visits', 'junctions',
+                                                'backtracks', 'solutions'))
+
+            def count(kind):
+                def hook(*args):
+                    calls[kind] += 1
+                return(hook)
+
+            stats = SolverStats(count('visits'), count('junctions'),
+                                count('backtracks'), count('solutions'))
+            found = search(maze, *args, stats=stats)
+            assert found == search(maze, *args)
+            counts = stats.counts()
+            assert dict((kind, counts[kind]) for kind in calls) == calls
+            if search is shortest_paths:
+                assert counts['solutions'] >= len(found or [])
+
+
+@pytest.mark.parametrize('malformed', (False, True))
+def test_solver_stats_follow_the_path(malformed):
+    random = Random(30)
+    for trial in range(200):
+        maze = random_maze(random, malformed=malformed)
+        point = (random.randrange(len(maze)), random.randrange(len(maze[0])))
+        for search in ('solve', 'walk', 'search'):
+            # Depth of the path and the cell last added to it.
+            state = {'depth': 0, 'cell': None}
+
+            def visit(cell, depth):
+                assert depth == state['depth'] + 1
+                state.update(depth=depth, cell=cell)
+
+            def junction(cell, depth):
+                assert (cell, depth) == (state['cell'], state['depth'])
+
+            def backtrack(cell, depth):
+                assert depth == state['depth'] - 1
+                state.update(depth=depth, cell=None)
+
+            stats = SolverStats(visit, junction, backtrack)
+            if search == 'solve':
+                solution = solve_maze(maze, stats)
+                if solution is not None:
+                    assert state['depth'] == len(solution)
+                    assert stats.peak_depth >= len(solution)
+            elif search == 'walk':
+                list(iter_shortest_walks(as_maze(maze), point, stats=stats))
+                assert state['depth'] == 0
+            else:
+                shortest_paths_search(maze, point, stats=stats)
+            counts = stats.counts()
+            assert counts['visits'] - counts['backtracks'] == state['depth']
+
+
+def test_solver_stats_count_junctions_alike():
+    # A corridor down to the exit with a dead end to the right, where
+    # only the cell it leaves from has two ways on. The exit has three
+    # openings but only one way on into the maze.
+    maze = [[(True, False, True, False), (False, False, True, False)],
+            [(True, True, True, False), (True, False, False, True)],
+            [(True, True, True, False), (False, False, False, True)]]
+    stats = SolverStats()
+    assert solve_maze(maze, stats) == [(0, 0), (1, 0), (2, 0)]
+    assert stats.counts() == {'visits': 3, 'junctions': 1, 'backtracks': 0,
+                              'solutions': 1, 'peak_depth': 3}
+    stats = SolverStats()
+    shortest_paths_search(maze, (2, 0), stats=stats)
+    assert stats.junctions == 1
+    # Walks only take shortest moves, so the dead end is no way on.
+    stats = SolverStats()
+    list(iter_shortest_walks(as_maze(maze), (2, 0), stats=stats))
+    assert stats.junctions == 0
+
+
+@pytest.mark.parametrize('packed', (False, True))
+def test_trace_round_trip(tmp_path, packed):
+    random = Random(24)
+    path = str(tmp_path / 'trace.bin')
+    for trial in range(20):
+        maze = random_maze(random, max_side=8)
+        point = (random.randrange(len(maze)), random.randrange(len(maze[0])))
+        events = []
+        stats = SolverStats(
+            lambda cell, depth: events.append((TRACE_VISIT,) + cell +
+                                              (depth,)),
+            lambda cell, depth: events.append((TRACE_JUNCTION,) + cell +
+                                              (depth,)),
+            lambda cell, depth: events.append((TRACE_BACKTRACK,) + cell +
+                                              (depth,)),
+            lambda path: events.append((TRACE_SOLUTION,) + path[-1] +
+                                       (len(path),)))
+        shortest_paths(maze, point, stats=stats)
+        trace = iter_trace(shortest_paths, maze, point, packed=packed,
+                           chunk_size=7)
+        assert write_trace(trace, path) == len(events)
+        assert list(read_trace(path, chunk_size=5)) == events
+        chunks = list(read_trace(path, packed=True, chunk_size=5))
+        assert [list(chunk) for chunk in chunks] == [
+            [value for event in events[start:start + 5] for value in event]
+            for start in range(0, len(events), 5)]
+        if not packed:
+            assert list(iter_trace(shortest_paths, maze, point)) == events
+
+
+def test_closing_a_trace_stops_its_search():
+    threads = set(threading.enumerate())
+    trace = iter_trace(solve_maze, generate_maze(200, 200, 24),
+                       chunk_size=16)
+    assert next(trace)[0] == TRACE_VISIT
+    trace.close()
+    assert set(threading.enumerate()) <= threads
+
+
+def test_trace_raises_search_errors():
+    def failing_search(maze, stats=None):
+        stats.visit((0, 0), 1)
+        raise KeyError('search failed')
+
+    with pytest.raises(KeyError):
+        list(iter_trace(failing_search, [[(True, False, True, False)]]))
+
+
+def test_search_deadline_stops_search():
+    maze = braid_maze(generate_maze(40, 40, 1, compact=True), 0.3, 1)
+    paths, complete = bounded_shortest_paths(maze, (20, 39), timeout=0.0)
+    assert not complete
+
+
+def test_finished_walks_are_complete_after_the_deadline():
+    # The walk takes too few steps to read the clock, so it finishes.
+    maze = generate_maze(4, 4, 2, compact=True)
+    paths, complete = bounded_shortest_paths(maze, maze.exit_point,
+                                             timeout=0.0)
+    assert complete and paths == shortest_paths(maze, maze.exit_point)
+
+
+def test_from_list_accepts_list_cells():
+    maze = [[[True, True, False, False], [False, False, True, True]],
+            [[False, True, True, False], [True, False, False, True]]]
+    assert Maze.from_list(maze) == Maze.from_list(
+        [[tuple(cell) for cell in row] for row in maze])
+    assert solve_maze(maze) == [(0, 0), (0, 1), (1, 1), (1, 0)]
+    with pytest.raises(ValueError):
+        Maze.from_list([[[True, False]]])
+
+
+def test_read_trace_checks_event_width(tmp_path):
+    path = str(tmp_path / 'trace.bin')
+    write_trace([(TRACE_VISIT, 0, 0, 1)], path)
+    with open(path, 'r+b') as trace_file:
+        trace_file.seek(TRACE_FILE_HEADER.size - 2)
+        trace_file.write(b'\x05\x00')
+    with pytest.raises(ValueError) as error:
+        list(read_trace(path))
+    assert '5 integers' in str(error.value)
+
+###############################################################################
+
+@pytest.mark.parametrize('malformed', (False, True))
+def test_rendering_matches_reference(malformed):
+    random = Random(14)
+    for trial in range(200):
+        maze = random_maze(random, max_side=8, malformed=malformed)
+        expected = reference_visualise_maze(maze)
+        assert visualise_maze(maze) == expected
+        assert visualise_maze(as_maze(maze)) == expected
+
+
+def test_write_visual_maze_streams_drawing():
+    random = Random(15)
+    for trial in range(50):
+        maze = random_maze(random, max_side=8)
+        stream = StringIO()
+        write_visual_maze(maze, stream)
+        assert stream.getvalue() == visualise_maze(maze)
+    stream = StringIO()
+    write_visual_maze(generate_maze_rows(20, 30, 15), stream)
+    assert stream.getvalue() == visualise_maze(
+        list(generate_maze_rows(20, 30, 15)))
+
+
+def test_visualise_maze_overlays_paths_and_windows():
+    random = Random(16)
+    for trial in range(100):
+        maze = random_maze(random, max_side=8)
+        rows, cols = len(maze), len(maze[0])
+        lines = visualise_maze(maze).splitlines()
+        path = [(random.randrange(rows), random.randrange(cols))
+                for step in range(5)]
+        marked = visualise_maze(maze, [path], marker='o').splitlines()
+        assert marked[0] == lines[0]
+        for row_num in range(rows):
+            line = list(lines[row_num + 1])
+            for col_num in range(cols):
+                if (row_num, col_num) in path:
+                    line[1 + 2 * col_num] = 'o'
+            assert marked[row_num + 1] == ''.join(line)
+
+        row_start = random.randrange(rows)
+        row_stop = random.randint(row_start + 1, rows)
+        col_start = random.randrange(cols)
+        col_stop = random.randint(col_start + 1, cols)
+        window = visualise_maze(maze, row_range=(row_start, row_stop),
+                                col_range=(col_start, col_stop))
+        window = window.splitlines()
+        assert len(window) == row_stop - row_start + 1
+        assert window[0] == '_' + ''.join(
+            '  ' if cell[U] else '__'
+            for cell in maze[row_start][col_start:col_stop])
+        for row_num, line in zip(range(row_start, row_stop), window[1:]):
+            left = ' ' if maze[row_num][col_start][L] else '|'
+            assert line == left + lines[row_num + 1][1 + 2 * col_start:
+                                                     1 + 2 * col_stop]
+
+
+def test_visualise_maze_windows_are_slices():
+    random = Random(29)
+    for trial in range(200):
+        maze = random_maze(random, max_side=8)
+        rows, cols = len(maze), len(maze[0])
+        path = [(random.randrange(rows), random.randrange(cols))
+                for step in range(5)]
+        lines = visualise_maze(maze, [path, None]).splitlines()
+        row_range = (random.randint(-9, 9), random.choice((None, 3, -2, 9)))
+        col_range = (random.randint(-9, 9), random.choice((None, 3, -2, 9)))
+        row_nums = range(rows)[slice(*row_range)]
+        col_nums = range(cols)[slice(*col_range)]
+        if not row_nums or not col_nums:
+            with pytest.raises(IndexError):
+                visualise_maze(maze, [path], row_range, col_range)
+            continue
+        window = visualise_maze(maze, [path], row_range,
+                                col_range).splitlines()
+        assert window[0] == '_' + ''.join(
+            '  ' if maze[row_nums[0]][col_num][U] else '__'
+            for col_num in col_nums)
+        assert len(window) == len(row_nums) + 1
+        for row_num, line in zip(row_nums, window[1:]):
+            left = ' ' if maze[row_num][col_nums[0]][L] else '|'
+            assert line == left + lines[row_num + 1][1 + 2 * col_nums[0]:
+                                                     1 + 2 * col_nums[-1] + 2]
+    with pytest.raises(ValueError):
+        visualise_maze(generate_maze_rows(3, 3, 1), row_range=(-2, None))
+
+
+@pytest.mark.parametrize('mapped', (False, True))
+def test_save_load_round_trip(tmp_path, mapped):
+    random = Random(17)
+    path = str(tmp_path / 'maze.bin')
+    for trial in range(100):
+        maze = random_maze(random, max_side=9, malformed=trial % 2 == 1)
+        save_maze(maze, path)
+        loaded = load_maze(path, mapped=mapped)
+        assert loaded.rows == len(maze) and loaded.cols == len(maze[0])
+        assert [list(row) for row in loaded] == maze
+        assert loaded.entry_point == get_entry_point(maze)
+        assert loaded.exit_point == get_exit_point(maze)
+        assert solve_maze(loaded) == solve_maze(maze)
+        del loaded
+    with open(path, 'wb') as maze_file:
+        maze_file.write(b'not a maze file at all')
+    with pytest.raises(ValueError):
+        load_maze(path)
+
+
+@pytest.mark.parametrize('mapped', (True, False))
+def test_load_maze_checks_header(tmp_path, mapped):
+    random = Random(27)
+    path = str(tmp_path / 'maze.bin')
+    for trial in range(50):
+        maze = random_maze(random, max_side=9)
+        save_maze(maze, path)
+        with open(path, 'rb') as maze_file:
+            saved = maze_file.read()
+        header = list(MAZE_FILE_HEADER.unpack_from(saved))
+        # Columns past the edge, or of cells closed there, are ignored.
+        header[4 + trial % 2] = random.choice((len(maze[0]), 2 ** 32 - 2,
+                                               random.randrange(len(maze[0]))))
+        with open(path, 'wb') as maze_file:
+            maze_file.write(MAZE_FILE_HEADER.pack(*header) +
+                            saved[MAZE_FILE_HEADER.size:])
+        with open(path, 'rb') as maze_file:
+            streamed = next(read_binary_mazes(maze_file))
+        loaded = load_maze(path, mapped=mapped)
+        for grid in (loaded, streamed):
+            assert grid.entry_point == get_entry_point(maze)
+            assert grid.exit_point == get_exit_point(maze)
+        del loaded, grid
+        with open(path, 'ab') as maze_file:
+            maze_file.write(saved)
+        with pytest.raises(ValueError):
+            load_maze(path, mapped=mapped)
+
+
+def test_parse_visual_maze_round_trip():
+    random = Random(18)
+    for trial in range(200):
+        maze = random_maze(random, max_side=8)
+        text = visualise_maze(maze)
+        assert parse_visual_maze(text) == maze
+        assert parse_visual_maze(StringIO(text), compact=True).to_list() == (
+            maze)
+    for text in ('not a maze\n', '_  __\n|_* |\n|  _|\n'):
+        with pytest.raises(ValueError):
+            parse_visual_maze(text)
+
+
+def test_rendering_accepts_list_cells():
+    random = Random(14)
+    for trial in range(50):
+        maze = random_maze(random, max_side=8, malformed=trial % 2 == 1)
+        assert visualise_maze(json.loads(json.dumps(maze))) == (
+            reference_visualise_maze(maze))
+    maze = [[[True, True, False, False], [False, False, True, True]],
+            [[False, True, True, False], [True, False, False, True]]]
+    assert visualise_maze(maze) == '_  __\n|_  |\n|  _|\n'
+
+###############################################################################
+
+def test_process_mazes_match_process_maze():
+    random = Random(19)
+    mazes = [random_maze(random, malformed=index % 3 == 0)
+             for index in range(30)]
+    mazes.append([[(True, True, True, True)]])
+    expected = [process_maze(maze, get_exit_point) for maze in mazes]
+    for single in expected:
+        del single['seconds']
+    for ordered in (True, False):
+        results = list(process_mazes(mazes, get_exit_point, workers=2,
+                                     chunksize=4, ordered=ordered))
+        if not ordered:
+            results.sort(key=lambda result: result['index'])
+        assert [result['index'] for result in results] == list(
+            range(len(mazes)))
+        for result, single in zip(results, expected):
+            del result['index'], result['seconds']
+            assert result == single
+
+
+def test_command_line(tmp_path, capsys):
+    random = Random(25)
+    mazes = [random_maze(random) for index in range(5)]
+    jsonl = tmp_path / 'mazes.jsonl'
+    jsonl.write_text(''.join(json.dumps(maze) + '\n' for maze in mazes) +
+                     '[[[true, true, true, true]]]\n')
+    assert main(['solve', str(jsonl), '-j', '2']) == 1
+    lines = capsys.readouterr().out.splitlines()
+    results = [json.loads(line) for line in lines]
+    assert [result['source'] for result in results] == [
+        '%s:%d' % (jsonl, line_num) for line_num in range(1, 7)]
+    for result, maze in zip(results, mazes):
+        assert result['valid']
+        solution = solve_maze(maze)
+        assert result['solution'] == (solution and [list(cell)
+                                                    for cell in solution])
+    assert results[-1]['violation'] == json.loads(json.dumps(
+        find_violation([[(True, True, True, True)]])))
+
+    binary = tmp_path / 'maze.bin'
+    text = tmp_path / 'maze.txt'
+    save_maze(mazes[0], str(binary))
+    text.write_text(visualise_maze(mazes[0]))
+    assert main(['validate', str(binary), str(text), '-j', '1']) == 0
+
+
+def test_command_line_reads_files_in_given_format(tmp_path, capsys):
+    maze = random_maze(Random(25))
+    binary = tmp_path / 'maze.bin'
+    text = tmp_path / 'maze.txt'
+    save_maze(maze, str(binary))
+    text.write_text(visualise_maze(maze))
+    assert main(['validate', '--format', 'binary', str(binary), str(text),
+                 '-j', '1']) == 1
+    results = [json.loads(line)
+               for line in capsys.readouterr().out.splitlines()]
+    assert results[0]['valid'] and not results[1]['valid']
+    assert 'maze file' in results[1]['error']
+
+
+@pytest.mark.parametrize('maze_format', ('auto', 'binary'))
+def test_command_line_reads_every_maze_of_binary_files(tmp_path, capsys,
+                                                        maze_format):
+    random = Random(28)
+    mazes = [random_maze(random) for index in range(3)]
+    binary = tmp_path / 'mazes.bin'
+    contents = b''
+    for maze in mazes:
+        save_maze(maze, str(binary))
+        contents += binary.read_bytes()
+    binary.write_bytes(contents)
+    assert main(['solve', '--format', maze_format, str(binary),
+                 '-j', '1']) == 0
+    results = [json.loads(line)
+               for line in capsys.readouterr().out.splitlines()]
+    assert len(results) == len(mazes)
+    for result, maze in zip(results, mazes):
+        solution = solve_maze(maze)
+        assert result['solution'] == (solution and [list(cell)
+                                                    for cell in solution])
+    binary.write_bytes(contents + b'RB')
+    with pytest.raises(SystemExit):
+        main(['solve', '--format', maze_format, str(binary), '-j', '1'])
+    assert str(binary) in capsys.readouterr().err
+
+
+def test_results_report_when_the_solver_gives_up(tmp_path, capsys):
+    solved, abandoned = (generate_maze(4, 4, seed) for seed in (0, 1))
+    assert process_maze(solved)['solved'] is True
+    result = process_maze(abandoned, render=True)
+    assert result['solved'] is False and result['solution'] is None
+    assert result['rendering'] == visualise_maze(abandoned)
+    assert process_maze([[(True, True, True, True)]])['solved'] is None
+    assert process_maze(abandoned, solve=False)['solved'] is None
+
+    jsonl = tmp_path / 'mazes.jsonl'
+    jsonl.write_text(''.join(json.dumps(maze) + '\n'
+                             for maze in (solved, abandoned)))
+    assert main(['solve', str(jsonl), '-j', '1']) == 0
+    results = [json.loads(line)
+               for line in capsys.readouterr().out.splitlines()]
+    assert [result['solved'] for result in results] == [True, False]
+    assert main(['render', str(jsonl), '-j', '1']) == 0
+    errors = capsys.readouterr().err.splitlines()
+    assert [error.endswith('solver gave up') for error in errors] == [
+        False, True]